@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import time
+
+import numpy as np
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class AutoExposure:
+    '''
+    Software auto-exposure keeping the brightest peak just under saturation.
+    Each frame given to update() is measured: its peak, the max of its
+    FrameStats, and the number of saturated pixels of a strided subsample
+    (one pixel out of stride**2). The exposure is scaled so that the peak
+    reaches target*max_value, by a factor bounded by max_step and at most
+    every interval s: a frame with any saturated pixel is thus brought down
+    by target. When more than saturation_limit pixels of the subsample are
+    saturated, the exposure is divided by max_step instead.
+    The frames taken before the last change (older settings generation) are
+    ignored, so the loop does not react twice to the same image.
+    '''
+    def __init__(self, camera, settings=None, target=0.9, saturation_limit=0, stride=4, max_step=1.5, interval=0.2, exposure_range=(0.01, 99.)):
+        self.camera     = camera
+        self.settings   = settings # a CameraSettings, else the exposure is set with camera.submit
+        self.target     = target
+        self.saturation_limit = saturation_limit # pixels of the subsample
+        self.stride     = stride
+        self.max_step   = max_step
+        self.interval   = interval # s
+        self.exposure_range = exposure_range # ms
+        self.reset()
+
+    def reset(self):
+        self.last_update     = -np.inf
+        self.last_generation = None
+        self.saturated       = 0
+        self.peak            = 0
+
+    def measure(self, frame):
+        '''
+        Return the number of saturated pixels of the subsampled frame (a
+        Frame) and the peak of the whole frame.
+        '''
+        sample    = frame.data[::self.stride, ::self.stride]
+        max_value = getattr(self.camera, 'max_value', 255)
+        self.peak = frame.stats().max
+        self.saturated = np.count_nonzero(sample >= max_value) if self.peak >= max_value else 0
+        return self.saturated, self.peak
+
+    def update(self, frame):
+        '''
+        Measure frame (a Frame) and change the exposure if needed.
+        Return the new exposure in ms, None if unchanged.
+        '''
+        now = time.perf_counter()
+        if now - self.last_update < self.interval:
+            return None
+        if frame.generation == self.last_generation and now - self.last_update < 5*self.interval:
+            return None # the last change is not applied yet
+        exposure = frame.exposure if frame.exposure else self.camera.getExposure()
+        if not exposure:
+            return None
+        saturated, peak = self.measure(frame)
+        max_value       = getattr(self.camera, 'max_value', 255)
+        # ---  --- #
+        if saturated > self.saturation_limit:
+            factor = 1./self.max_step
+        else:
+            factor = self.target * max_value / max(peak, 1.)
+            factor = np.clip(factor, 1./self.max_step, self.max_step)
+        new_exposure = float(np.clip(exposure*factor, *self.exposure_range))
+        if abs(new_exposure - exposure) < 1e-2 * exposure:
+            return None
+        # ---  --- #
+        self.last_update     = now
+        self.last_generation = frame.generation
+        if self.settings is not None:
+            self.settings.request('exposure', new_exposure)
+        else:
+            self.camera.submit(self.camera.setExposure, new_exposure)
+        return new_exposure
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    print('FINISHED')
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import abc
+import time
+
+import numpy as np
+
+from s_Workers_class                  import FrameQueue, AcquisitionThread, run_between_frames
+from s_Workers_class                  import allocate_frame_stack, movie_statistics, timestamps_path, MOVIE_MEMORY_BUDGET
+from s_FrameHub_class                 import FrameHub
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class CameraBackend(abc.ABC):
+    '''
+    What the widgets and workers expect from a camera (Camera, SimuCamera, SyntheticCamera).
+    A backend sets in its __init__ the attributes:
+        - log, isCameraInit, fps, max_value
+        - frame_queue, acquisition, on_frame   (None until used)
+        - frame_counter                        (a FrameCounter)
+        - settings_generation                  (0, increased at each setting change)
+    The acquisition thread handling is common to all the backends, which only
+    implement the device access below. Once get_hub() was called, the
+    acquisition thread feeds the FrameHub of the camera instead of a
+    FrameQueue of its own, whoever starts it.
+    '''
+    hub = None
+    # --- device --- #
+    @abc.abstractmethod
+    def initialize(self):
+        '''Open the device and set isCameraInit.'''
+
+    @abc.abstractmethod
+    def close_camera(self):
+        '''Stop the acquisition and close the device.'''
+
+    # --- frames --- #
+    @abc.abstractmethod
+    def waitForNextFrame(self, timeout=1000):
+        '''Block until a frame is there (timeout in ms), return whether one came.'''
+
+    @abc.abstractmethod
+    def get_frame(self, color=False):
+        '''Return a copy of the current image as a numpy array.'''
+
+    @abc.abstractmethod
+    def get_frame_record(self, color=False):
+        '''Return the current image as a Frame, and count it in frame_counter.'''
+
+    # --- video and events --- #
+    @abc.abstractmethod
+    def capture_video(self):
+        '''Start the live video of the device.'''
+
+    @abc.abstractmethod
+    def stop_video(self):
+        '''Stop the live video of the device.'''
+
+    @abc.abstractmethod
+    def enable_frame_event(self):
+        '''Let waitForNextFrame block on the frame event.'''
+
+    @abc.abstractmethod
+    def disable_frame_event(self):
+        '''Stop signaling the frames.'''
+
+    # --- buffers and AOI --- #
+    @abc.abstractmethod
+    def set_colormode(self):
+        '''Apply the current color mode.'''
+
+    @abc.abstractmethod
+    def alloc(self):
+        '''(Re)allocate the frame buffers for the current AOI and color mode.'''
+
+    @abc.abstractmethod
+    def get_aoi(self):
+        '''Return the AOI as (x, y, width, height) in sensor pixels.'''
+
+    @abc.abstractmethod
+    def set_aoi(self, x, y, width, height):
+        '''Set the AOI as is, without reallocation.'''
+
+    @abc.abstractmethod
+    def set_roi(self, x, y, width, height, max_fps=True):
+        '''Restrict the frames to a rectangle, return the AOI applied.'''
+
+    @abc.abstractmethod
+    def reset_roi(self, max_fps=True):
+        '''Back to the full sensor, return the AOI applied.'''
+
+    # --- settings --- #
+    @abc.abstractmethod
+    def getExposure(self):
+        '''Exposure time in ms.'''
+
+    @abc.abstractmethod
+    def setExposure(self, exp_val):
+        '''Exposure time in ms.'''
+
+    @abc.abstractmethod
+    def setHarwareGain(self, gain_val):
+        '''Master gain, from 0 to 100.'''
+
+    @abc.abstractmethod
+    def getFrameTimeRange(self):
+        '''Return the min, max and step of the frame time in s.'''
+
+    @abc.abstractmethod
+    def getFrameRate(self):
+        '''Frame rate in Hz.'''
+
+    @abc.abstractmethod
+    def setFrameRate(self, fr):
+        '''Frame rate in Hz, return the one applied.'''
+
+    @abc.abstractmethod
+    def getPixelClock(self):
+        '''Pixel clock in MHz.'''
+
+    @abc.abstractmethod
+    def getPixelClockList(self):
+        '''Pixel clocks accepted, in MHz, increasing.'''
+
+    @abc.abstractmethod
+    def setPixelClock(self, pxl_clck):
+        '''Pixel clock in MHz.'''
+
+    # --- common to all the backends --- #
+    def addToLog(self, txt):
+        if self.log != None:
+            self.log.addText(txt)
+        else:
+            print(txt)
+
+    def start_acquisition(self, queue_size=4):
+        '''
+        Start the live video and the background thread filling frame_queue.
+        '''
+        if self.acquisition is not None:
+            return None
+        if self.hub is not None:
+            self.frame_queue = self.hub
+        else:
+            self.frame_queue = FrameQueue(maxsize=queue_size)
+        self.frame_counter.reset()
+        self.enable_frame_event()
+        self.capture_video()
+        self.acquisition = AcquisitionThread(self, self.frame_queue, on_frame=self.on_frame)
+        self.acquisition.start()
+
+    def stop_acquisition(self):
+        if self.acquisition is None:
+            return None
+        self.acquisition.stop()
+        self.acquisition = None
+        if self.frame_queue is not self.hub:
+            self.frame_queue.clear() # the frames not read give their buffer back
+        self.stop_video()
+        self.disable_frame_event()
+
+    def acquire_movie(self, num_frames, memory_budget=MOVIE_MEMORY_BUDGET, filename=None, timeout=1000):
+        '''
+        Burst acquisition into a preallocated (num_frames, H, W) array, stats
+        in movie_stats and frame times in movie_times (saved next to the
+        movie when it is a memmap, see timestamps_path). Each image is copied
+        by get_frame: backends with zero-copy buffers override it (see
+        Camera.acquire_movie).
+        '''
+        wasOn = self.acquisition is not None
+        self.stop_acquisition()
+        movie = None
+        times = np.zeros(num_frames)
+        first_time = last_time = time.perf_counter()
+        i = 0
+        # ---  --- #
+        self.enable_frame_event()
+        try:
+            while i < num_frames:
+                if not self.waitForNextFrame(timeout):
+                    break
+                data      = self.get_frame()
+                last_time = time.perf_counter()
+                if movie is None:
+                    movie      = allocate_frame_stack(num_frames, data.shape, data.dtype, memory_budget, filename)
+                    first_time = last_time
+                movie[i] = data
+                times[i] = last_time - first_time
+                i += 1
+        finally:
+            self.disable_frame_event()
+        # ---  --- #
+        self.movie_times = times[:i]
+        if isinstance(movie, np.memmap):
+            np.save(timestamps_path(movie.filename), self.movie_times)
+        self.movie_stats = movie_statistics(i, first_time, last_time, 0)
+        self.addToLog('Movie: {frames} frames at {fps:.2f} fps, {dropped} dropped.'.format(**self.movie_stats))
+        if wasOn:
+            self.start_acquisition()
+        if movie is None:
+            return np.empty((0, 0, 0), dtype=np.uint8)
+        return movie[:i]
+
+    def submit(self, func, *args):
+        '''
+        Run func(*args) between two frames of the acquisition thread, or right
+        away when there is no video, and return a Future of its result.
+        '''
+        return run_between_frames(self, func, *args)
+
+    def get_hub(self):
+        '''
+        Return the FrameHub through which the widgets share the frames of
+        this camera.
+        '''
+        if self.hub is None:
+            self.hub = FrameHub(self)
+            if self.acquisition is not None:
+                self.frame_queue = self.acquisition.frame_queue = self.hub
+        return self.hub
+
+    def get_latest_frame(self):
+        '''
+        Return the newest frame delivered by the acquisition thread, None if no
+        new frame arrived since the last call. The caller releases it.
+        '''
+        if self.frame_queue is None:
+            return None
+        return self.frame_queue.get_latest()
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    print('FINISHED')
@@ -10,8 +10,8 @@ import sys
 import PyQt5
 from PyQt5.QtWidgets import QWidget, QFrame, QApplication
 from PyQt5.QtWidgets import QVBoxLayout,QHBoxLayout,QSplitter,QGridLayout
-from PyQt5.QtWidgets import QLabel, QPushButton, QLineEdit, QSpinBox, QDoubleSpinBox, QSlider, QComboBox, QFileDialog
-from PyQt5.QtCore    import Qt, QThread, QTimer, QObject, pyqtSignal, pyqtSlot, QRect, QLine
+from PyQt5.QtWidgets import QLabel, QPushButton, QLineEdit, QSpinBox, QDoubleSpinBox, QSlider, QComboBox, QFileDialog, QCheckBox
+from PyQt5.QtCore    import Qt, QThread, QTimer, QObject, pyqtSignal, pyqtSlot, QRect, QRectF, QLine
 from PyQt5.QtGui     import QPainter
 
 import numpy     as np
@@ -25,6 +25,10 @@ from s_ToolObjects_class              import QVLine
 from s_Miscellaneous_functions        import *
 from s_SimuCamera_class               import SimuCamera
 from s_Camera_class                   import Camera
+from s_SyntheticCamera_class          import SyntheticCamera
+from s_CameraSettings_class           import CameraSettings
+from s_ThroughputPlanner_class        import ThroughputPlanner
+from s_AutoExposure_class             import AutoExposure
 
 
 import time
@@ -33,9 +37,36 @@ import time
 #########################################################################################################################
 
 class CameraDisplay(QWidget):
-    frame_updated = pyqtSignal()
+    '''
+    Live view of a camera. The acquisition thread of the camera runs at the
+    camera frame rate and hands the frames to the FrameHub of the camera,
+    shared with the other views. The view subscribes to it twice:
+        - for the analysis, with its policy ('every' frame or 'decimated',
+          see Subscription): an AnalysisThread emits frame_acquired(frame)
+          for each of them. Slots connected with Qt.DirectConnection run in
+          that thread, the frame being released once they return. With the
+          'latest' policy there is no analysis thread.
+        - for the display, 'latest' only: the timer, at the display rate
+          self.fps, draws the newest frame (frame and frame_record) then
+          emits frame_updated.
+    A single frame (next frame, view stopped) is analysed in the GUI thread.
+    The frames acquired but not drawn are counted in self.skipped.
+    Drawing only hands the frame, row-major as it comes, to the ImageItem
+    with a fixed uint8 lookup table per colormap: the levels histogram is
+    refreshed by its own timer every HISTOGRAM_PERIOD ms, the labels every
+    LABEL_PERIOD ms from the FrameStats of the frame. Only the visible
+    part of the frame is drawn, block-reduced to the screen resolution.
+    '''
+    frame_acquired = pyqtSignal(object) # Frame, from the analysis thread
+    frame_updated  = pyqtSignal()
+    plan_applied   = pyqtSignal(dict)
+    message        = pyqtSignal(str) # text for the log, from the worker threads
+    QUEUE_PERIODS  = 4 # display periods of frames kept for the analysis
+    HISTOGRAM_PERIOD = 1000 # ms, refresh of the levels histogram
+    LABEL_PERIOD   = 250 # ms, refresh of the max / dropped / not drawn labels
+    POOLING        = 'max' # block_reduce mode of the display, 'max' keeps the peaks
     # ~~~~~~~~~~~~~~~~~~~~~~~~ #
-    def __init__(self, camera=None, log=None, fps=10.):
+    def __init__(self, camera=None, log=None, fps=10., policy='every'):
         super().__init__()
         # ---  --- #
         if log != None:
@@ -45,22 +76,39 @@ class CameraDisplay(QWidget):
         #self.log.show()
         # --- default --- #
         self.fps       = fps
+        self.policy    = policy # of the analysis subscription to the FrameHub of the camera
+        self.subscription = None # display, 'latest'
+        self.analysis_subscription = None
+        self.analysis_thread = None
         self.normalise_hist = True
         self.cmap      = 'jet'
         # --- main attriute --- #
         self.camera    = camera
-        self.contview  = ContinuousView(fps=self.fps)
         self.timer     = pg.QtCore.QTimer() #QTimer()# pg.QtCore.QTimer()
+        self.timer.timeout.connect(self.update_frame)
         self.qlabl_max = QLabel()
+        self.qlabl_dropped = QLabel('0')
+        self.qlabl_skipped = QLabel('0')
+        self.skipped   = 0 # acquired frames not drawn
         self.isOn      = False
         self.frame     = None
+        self.frame_record = None
         # --- color acuisition --- #
         self.initColorDic()
         # ---  --- #
         self.initUI()
         self.initCamera(camera)
         # ---  --- #
-        self.camera.setExposure( self.exposure.value() )
+        self.settings  = CameraSettings(self.camera, log=self.log)
+        self.settings.changed.connect( self.displaySettings )
+        self.settings.request('exposure', self.exposure.value())
+        self.settings.apply()
+        self.planner   = ThroughputPlanner(self.camera)
+        self.autoexposure = AutoExposure(self.camera, settings=self.settings)
+        self.plan_applied.connect( self.displayPlan )
+        self.message.connect( self.log.addText )
+        self.updatePixelClockRange()
+        self.updateFrameRateRange()
 
     def initUI(self):
         # ---  --- #
@@ -82,24 +130,47 @@ class CameraDisplay(QWidget):
         self.which_camera  = QComboBox()
         self.which_camera.addItem('USB camera')
         self.which_camera.addItem('From Image Dir.')
+        self.pixel_format  = QComboBox()
+        for key in Camera.PIXEL_FORMATS:
+            self.pixel_format.addItem(key)
+        self.button_roi     = QPushButton('Draw ROI')
+        self.button_roi.setCheckable(True)
+        self.button_roi.setToolTip('Show a rectangle to select the part of the sensor to read.')
+        self.button_setaoi  = QPushButton('AOI from ROI')
+        self.button_setaoi.setToolTip('Read only the rectangle: the smaller the AOI, the higher the camera fps.')
+        self.button_fullaoi = QPushButton('Full AOI')
+        self.button_plan    = QPushButton('Lowest pixel clock')
+        self.button_plan.setToolTip('Find the lowest pixel clock sustaining the camera fps and exposure asked, to spare the USB bandwidth.')
+        self.qlabl_bandwidth = QLabel('')
+        self.auto_exposure  = QCheckBox('Auto exposure')
+        self.auto_exposure.setToolTip('Adjust the exposure so that the brightest peak stays just under saturation.')
         # --- set default --- #
         self.exposure.setRange(0.10, 99.0)
         self.exposure.setValue(12.5)
-        self.cam_framerate.setRange(1.00, 15.0)
+        self.cam_framerate.setRange(1.00, 15.0) # set from the camera by updateFrameRateRange
         self.cam_framerate.setValue( 10.0 )
-        self.pixelclock.setRange(5, 30)
+        self.pixelclock.setRange(5, 30) # set from the camera by updatePixelClockRange
         self.pixelclock.setValue(20)
+        if hasattr(self.camera, 'pixel_format'):
+            self.pixel_format.setCurrentText(self.camera.pixel_format)
         # --- connections --- #
         self.button_startstop.clicked.connect(self.startStop_continuous_view)
         self.fps_input.valueChanged.connect(self.setFPS)
         self.button_nextFrame.clicked.connect( self.nextFrame )
-        self.exposure.valueChanged.connect( self.update_exposure )
-        self.cam_framerate.valueChanged.connect( self.update_camFPS )
-        self.pixelclock.valueChanged.connect( self.update_pixelClock )
+        self.exposure.valueChanged.connect( lambda val: self.settings.request('exposure', val) )
+        self.cam_framerate.valueChanged.connect( lambda val: self.settings.request('framerate', val) )
+        self.pixelclock.valueChanged.connect( lambda val: self.settings.request('pixelclock', int(val)) )
         self.which_camera.currentIndexChanged.connect( self.changeCameraStyle )
+        self.pixel_format.currentIndexChanged.connect( self.changePixelFormat )
+        self.button_roi.toggled.connect( self.toggleROI )
+        self.button_setaoi.clicked.connect( self.setAOIFromROI )
+        self.button_fullaoi.clicked.connect( self.resetAOI )
+        self.button_plan.clicked.connect( self.planThroughput )
+        self.auto_exposure.stateChanged.connect( self.toggleAutoExposure )
         # --- layout --- #
-        label_1 = QLabel('fps :')
+        label_1 = QLabel('Display fps:')
         label_1.setWordWrap(True)
+        label_1.setToolTip('Maximum redraw rate. The camera and the analysis run at the camera fps.')
         label_2 = QLabel('value max:') 
         label_2.setWordWrap(True)
         label_3 = QLabel('Which camera')
@@ -110,6 +181,14 @@ class CameraDisplay(QWidget):
         label_5.setWordWrap(True)
         label_6 = QLabel('Pixel clock (MHz):')
         label_6.setWordWrap(True)
+        label_7 = QLabel('Pixel format:')
+        label_7.setWordWrap(True)
+        label_8 = QLabel('Dropped frames:')
+        label_8.setWordWrap(True)
+        label_8.setToolTip('Frames missing in the sequence numbers of the camera since the start of the video.')
+        label_9 = QLabel('Not drawn:')
+        label_9.setWordWrap(True)
+        label_9.setToolTip('Frames not displayed, the camera being faster than the display fps. With the "every" policy they are still analysed.')
         grid = QGridLayout()
         grid.addWidget( self.button_startstop, 0,0)
         grid.addWidget( self.button_nextFrame, 0,1)
@@ -126,6 +205,18 @@ class CameraDisplay(QWidget):
         grid.addWidget( self.cam_framerate   , 1,3)
         grid.addWidget(label_6               , 1,4)
         grid.addWidget( self.pixelclock      , 1,5)
+        grid.addWidget(label_7               , 2,0)
+        grid.addWidget( self.pixel_format    , 2,1)
+        grid.addWidget(label_9               , 2,2)
+        grid.addWidget( self.qlabl_skipped   , 2,3)
+        grid.addWidget(label_8               , 2,4)
+        grid.addWidget( self.qlabl_dropped   , 2,5)
+        grid.addWidget( self.button_roi      , 3,0)
+        grid.addWidget( self.button_setaoi   , 3,1)
+        grid.addWidget( self.button_fullaoi  , 3,2)
+        grid.addWidget( self.button_plan     , 3,3)
+        grid.addWidget( self.qlabl_bandwidth , 3,4 , 1,2)
+        grid.addWidget( self.auto_exposure   , 3,7)
         self.layout.addLayout(grid)
         self.layout.addWidget(self.image_view)
         self.setLayout(self.layout)
@@ -142,16 +233,37 @@ class CameraDisplay(QWidget):
         self.colordic['jet_r'] = pg.ColorMap(positions_r, colors)
         # --- plasma cmap --- #
         self.colordic['plasma'] = generatePgColormap('plasma')
+        # --- fixed lookup tables, uint8 RGB --- #
+        self.lutdic = {}
+        for key in self.colordic:
+            self.lutdic[key] = self.colordic[key].getLookupTable(0., 1., 256, alpha=False)
 
     def initView(self):
         self.image_view     = pg.ImageView()
+        self.image_item     = self.image_view.getImageItem()
+        self.image_item.setOpts(axisOrder='row-major')
+        self.image_shape    = None
+        # --- the histogram is refreshed by hist_timer, not at each frame --- #
+        self.hist_item      = self.image_view.getHistogramWidget().item
+        self.image_item.sigImageChanged.disconnect(self.hist_item.imageChanged)
+        self.hist_timer     = QTimer()
+        self.hist_timer.timeout.connect(self.refreshHistogram)
+        self.label_timer    = QTimer()
+        self.label_timer.timeout.connect(self.refreshLabels)
+        # --- zoom and resize redraw the visible tile --- #
+        self.image_view.getView().sigRangeChanged.connect(self.viewChanged)
+        self.image_view.getView().sigResized.connect(self.viewChanged)
         # ---  --- #
-        self.image_view.setColorMap(self.colordic[self.cmap])
-        self.image_view.setLevels(0,255)
-        self.image_view.getHistogramWidget().item.setHistogramRange(0,255)
+        self.setColorMap(self.cmap)
+        self.setLevelsFromCamera()
         # ---  --- #
         self.image_view.setMinimumWidth(800)
         self.image_view.setMinimumHeight(600)
+        # --- rectangle used to set the AOI --- #
+        self.roi = pg.RectROI([0, 0], [200, 100], pen='r')
+        self.roi.addScaleHandle([0, 0], [1, 1])
+        self.image_view.getView().addItem(self.roi)
+        self.roi.hide()
 
     def initCamera(self, camera):
         self.default_camera = camera
@@ -161,6 +273,81 @@ class CameraDisplay(QWidget):
         if not self.camera.isCameraInit:
             self.camera.__init__()
 
+    def setLevelsFromCamera(self):
+        '''
+        Fit the display levels to the bit depth of the camera pixel format.
+        '''
+        max_value = getattr(self.camera, 'max_value', 255)
+        self.image_view.setLevels(0, max_value)
+        self.image_view.getHistogramWidget().item.setHistogramRange(0, max_value)
+
+    def setColorMap(self, cmap):
+        '''
+        Show the gradient of cmap in the histogram and draw with its fixed
+        lookup table.
+        '''
+        self.cmap = cmap
+        self.image_view.setColorMap(self.colordic[cmap])
+        self.image_item.setLookupTable(self.lutdic[cmap])
+
+    def refreshHistogram(self):
+        '''
+        Levels histogram of the whole current frame, from its FrameStats, so
+        that it does not change with the zoom.
+        '''
+        if self.frame_record is None or not self.image_view.ui.histogram.isVisible():
+            return None
+        self.hist_item.plot.setData( *self.frame_record.stats().histogram() )
+
+    def visibleTile(self, frame):
+        '''
+        Return the part of frame in the view, as (x0, y0, x1, y1) in pixels,
+        and the block sizes (fx, fy) of about one screen pixel.
+        '''
+        view          = self.image_view.getView()
+        rect          = view.viewRect()
+        height, width = frame.shape[:2]
+        x0, y0 = max(int(np.floor(rect.left())), 0), max(int(np.floor(rect.top())), 0)
+        x1, y1 = min(int(np.ceil(rect.right())), width), min(int(np.ceil(rect.bottom())), height)
+        px, py = view.viewPixelSize() # frame pixels per screen pixel
+        return (x0, y0, x1, y1), (max(1, int(px)), max(1, int(py)))
+
+    def drawFrame(self, frame):
+        '''
+        Draw the visible tile of frame, reduced by blocks (POOLING) to the
+        screen resolution, so that the peaks stay visible however small the
+        window. A zoom shows the tile at full resolution. The view is fitted
+        to new frame shapes.
+        '''
+        newShape = frame.shape != self.image_shape
+        if newShape:
+            self.image_shape = frame.shape
+            view = self.image_view.getView()
+            view.blockSignals(True) # no viewChanged redraw, the frame is drawn below
+            view.setRange(QRectF(0, 0, frame.shape[1], frame.shape[0]), padding=0)
+            view.blockSignals(False)
+        (x0, y0, x1, y1), (fx, fy) = self.visibleTile(frame)
+        if x1-x0 < fx or y1-y0 < fy:
+            return None # the frame is out of the view
+        tile = frame[y0:y1, x0:x1]
+        if fx != 1 or fy != 1:
+            tile = block_reduce(tile, fy, fx, self.POOLING)
+        self.image_item.setImage(tile, autoLevels=False)
+        self.image_item.setRect(QRectF(x0, y0, tile.shape[1]*fx, tile.shape[0]*fy))
+        if newShape:
+            self.refreshHistogram()
+
+    def viewChanged(self):
+        '''
+        Live, the next frame is drawn with the new view anyway.
+        '''
+        if self.frame is not None and not self.isOn:
+            self.drawFrame(self.frame)
+
+    def changePixelFormat(self):
+        self.camera.set_pixel_format( self.pixel_format.currentText() )
+        self.setLevelsFromCamera()
+
     def hideHistogram(self):
         self.image_view.ui.histogram.hide()
 
@@ -170,49 +357,183 @@ class CameraDisplay(QWidget):
 
     def setFPS(self):
         self.fps = self.fps_input.value()
-        self.contview.setFPS( self.fps )
         self.timer.setInterval(1e3/self.fps)
 
+    def analysis_fps(self):
+        '''
+        Camera frame rate, that of frame_acquired with the 'every' policy.
+        '''
+        framerate = self.settings.values['framerate']
+        return framerate if framerate else self.fps
+
+    def queueSize(self):
+        '''
+        QUEUE_PERIODS display periods of frames at the camera frame rate, the
+        lag allowed to the analysis thread.
+        '''
+        return int(self.QUEUE_PERIODS * max(self.analysis_fps(), self.fps) / self.fps) + 1
+
     def update_frame(self):
-        self.frame = self.camera.get_frame()
-        self.qlabl_max.setText( str(np.max(self.frame)) )
-        self.image_view.setImage(self.frame.T, autoHistogramRange=False, autoLevels=False)
+        '''
+        In continuous mode, display the newest frame received, the analysis
+        thread taking care of all of them. Otherwise take a single frame, from
+        the camera or from its FrameHub if another view is running it, and
+        analyse it here.
+        '''
+        if self.isOn:
+            record = self.subscription.get_latest()
+        elif self.camera.acquisition is not None:
+            record = self.camera.get_hub().get_latest()
+        else:
+            record = self.camera.get_frame_record()
+        if record is None:
+            return None
+        self.holdRecord(record)
+        if not self.isOn:
+            self.frame_acquired.emit(record)
+        if self.auto_exposure.isChecked():
+            self.autoexposure.update(record)
+        # ---  --- #
+        self.drawFrame(self.frame)
+        if not self.isOn:
+            self.refreshLabels()
+            self.refreshHistogram()
         self.frame_updated.emit()
 
-    def update_exposure(self):
-        self.camera.setExposure( self.exposure.value() )
-        self.log.addText( 'New exposure: {}ms'.format( self.camera.getExposure() ) )
-        # ---  --- #
-        new_pixelclock = self.camera.getPixelClock()
-        self.pixelclock.setValue( new_pixelclock )
-        new_camFPS     = self.camera.getFrameRate()
-        self.cam_framerate.setValue( new_camFPS )
-
-    def update_camFPS(self):
-        newfps = self.camera.setFrameRate( self.cam_framerate.value() )
-        self.log.addText('New camera fps: {:.3f}'.format( self.camera.getFrameRate() ) )
-        self.cam_framerate.setValue(newfps)
-        # ---  --- #
-        new_pixelclock = self.camera.getPixelClock()
-        self.pixelclock.setValue( new_pixelclock )
-        new_exposure   = self.camera.getExposure()
-        self.exposure.setValue( new_exposure )
-
-    def update_pixelClock(self):
-        self.camera.setPixelClock( int(self.pixelclock.value()) )
-        self.log.addText( 'New pixel clock: {}Mhz'.format( self.camera.getPixelClock() ))
-        # ---  --- #
-        new_camFPS     = self.camera.getFrameRate()
-        self.cam_framerate.setValue( new_camFPS )
-        new_exposure   = self.camera.getExposure()
-        self.exposure.setValue( new_exposure )
+    def holdRecord(self, record):
+        '''
+        Keep record as the current frame and release the previous one.
+        '''
+        if self.frame_record is not None:
+            self.frame_record.release()
+        self.frame_record = record
+        self.frame        = record.data
+
+    def keepRecord(self):
+        '''
+        Replace the current frame, kept while no video is shown, by a copy so
+        that its buffer goes back to the camera.
+        '''
+        if self.frame_record is None or self.frame_record.buffer is None:
+            return None
+        self.holdRecord(self.frame_record.copy())
+        self.drawFrame(self.frame)
+
+    def refreshLabels(self):
+        if self.frame_record is None:
+            return None
+        skipped = self.skipped
+        if self.subscription is not None:
+            skipped += self.subscription.dropped
+        self.qlabl_max.setText( str(self.frame_record.stats().max) )
+        self.qlabl_dropped.setText( str(self.camera.frame_counter.dropped) )
+        self.qlabl_skipped.setText( str(skipped) )
+
+    def displaySettings(self, values):
+        '''
+        Show the settings read back from the camera, without triggering new requests.
+        '''
+        for widget, name in [(self.pixelclock, 'pixelclock'), (self.cam_framerate, 'framerate'), (self.exposure, 'exposure')]:
+            if values[name] is None:
+                continue
+            widget.blockSignals(True)
+            widget.setValue( values[name] )
+            widget.blockSignals(False)
+
+    def toggleROI(self, checked):
+        if checked and self.frame is not None:
+            h, w = self.frame.shape[:2]
+            self.roi.setPos([w/4, h/4])
+            self.roi.setSize([w/2, h/2])
+        self.roi.setVisible(checked)
+
+    def setAOIFromROI(self):
+        '''
+        Restrict the camera AOI to the drawn rectangle, given in the
+        coordinates of the image displayed, i.e. of the current AOI.
+        '''
+        x, y = self.roi.pos()
+        w, h = self.roi.size()
+        x0, y0, _, _ = self.camera.get_aoi()
+        self.setAOI(x0+x, y0+y, w, h)
+        self.button_roi.setChecked(False)
+
+    def setAOI(self, x, y, width, height):
+        '''
+        Set the camera AOI (in sensor pixels), return the one applied, None
+        if the camera refused it.
+        '''
+        try:
+            aoi = self.camera.set_roi(x, y, width, height)
+        except Exception as err:
+            self.log.addText('Error: in setAOI.\n{}'.format(err))
+            return None
+        self.updateFrameRateRange()
+        self.settings.setCamera( self.camera )
+        return aoi
+
+    def resetAOI(self):
+        try:
+            aoi = self.camera.reset_roi()
+        except Exception as err:
+            self.log.addText('Error: in resetAOI.\n{}'.format(err))
+            return None
+        self.updateFrameRateRange()
+        self.settings.setCamera( self.camera )
+        return aoi
+
+    def toggleAutoExposure(self):
+        self.autoexposure.reset()
+        self.exposure.setEnabled( not self.auto_exposure.isChecked() )
+
+    def addText(self, txt):
+        '''
+        Log of the worker threads (see AnalysisThread): txt is queued to the
+        log of the GUI thread.
+        '''
+        self.message.emit(txt)
+
+    def planThroughput(self):
+        '''
+        The plan is run by the acquisition thread, its result comes back
+        through the plan_applied signal, its error through message.
+        '''
+        def done(future):
+            if future.exception() is None:
+                self.plan_applied.emit( future.result() )
+            else:
+                self.message.emit('Error: in planThroughput.\n{}'.format(future.exception()))
+        future = self.planner.apply( self.cam_framerate.value(), self.exposure.value() )
+        future.add_done_callback( done )
+
+    def displayPlan(self, plan):
+        self.qlabl_bandwidth.setText('{:.1f} MB/s'.format(plan['bandwidth']))
+        if not plan['feasible']:
+            self.log.addText('Warning: {0:.2f} fps (max {1:.2f}) needing {2:.1f} MB/s, over the camera or USB limits.'.format(plan['fps'], plan['max_fps'], plan['bandwidth']))
+        self.log.addText('Pixel clock {0} MHz for {1:.2f} fps, exposure {2:.2f} ms.'.format(plan['pixelclock'], plan['fps'], plan['exposure']))
+        self.updateFrameRateRange()
+        self.settings.setCamera( self.camera )
+
+    def updatePixelClockRange(self):
+        clocks = self.camera.getPixelClockList()
+        self.pixelclock.blockSignals(True)
+        self.pixelclock.setRange(clocks[0], clocks[-1])
+        self.pixelclock.blockSignals(False)
+
+    def updateFrameRateRange(self):
+        ftmin, ftmax, _ = self.camera.getFrameTimeRange()
+        if ftmin > 0:
+            self.cam_framerate.blockSignals(True)
+            self.cam_framerate.setRange(1./ftmax, 1./ftmin)
+            self.cam_framerate.blockSignals(False)
 
     def nextFrame(self):
-        wasOn = self.isOn
-        if not self.isOn:
+        wasOn = self.isOn or self.camera.acquisition is not None # the driver is read by the hub
+        if not wasOn:
             self.camera.capture_video()
         # ---  --- #
         self.update_frame()
+        self.keepRecord()
         # ---  --- #
         if not wasOn:
             self.camera.capture_video()
@@ -229,49 +550,58 @@ class CameraDisplay(QWidget):
             self.button_nextFrame.setFlat(True)
             self.button_nextFrame.setEnabled(False)
 
+    def subscribe(self):
+        '''
+        Receive the frames of the camera, whose acquisition runs as long as
+        a view is subscribed. The analysis queue holds QUEUE_PERIODS display
+        periods of frames, older ones being dropped if the analysis lags more
+        than that.
+        '''
+        hub = self.camera.get_hub()
+        self.subscription = hub.subscribe('latest')
+        self.subscription.start()
+        if self.policy == 'latest':
+            return None
+        self.analysis_subscription = hub.subscribe(self.policy, queue_size=self.queueSize())
+        self.analysis_subscription.start()
+        self.analysis_thread = AnalysisThread(self.analysis_subscription, self.frame_acquired.emit, log=self)
+        self.analysis_thread.start()
+
+    def unsubscribe(self):
+        if self.analysis_thread is not None:
+            self.analysis_thread.stop()
+            self.analysis_subscription.close()
+            self.analysis_thread, self.analysis_subscription = None, None
+        if self.subscription is None:
+            return None
+        self.skipped += self.subscription.dropped
+        self.subscription.close()
+        self.subscription = None
+
     def start_continuous_view(self):
-        self.camera.capture_video()
-        if   True:
-            self.start_continuous_view_qtimer()
-        elif False:
-            self.start_continuous_view_qthread()
+        '''
+        The camera acquisition thread captures at the camera frame rate, the
+        timer only sets the rate at which the newest frame is displayed.
+        '''
+        self.skipped = 0
+        self.subscribe()
+        self.timer.start(1e3/self.fps) #ms
+        self.hist_timer.start(self.HISTOGRAM_PERIOD)
+        self.label_timer.start(self.LABEL_PERIOD)
         # ---  --- #
         self.isOn = True
 
     def stop_continuous_view(self):
-        self.camera.stop_video()
-        if   True:
-            self.stop_continuous_view_qtimer()
-        elif False:
-            self.stop_continuous_view_qthread()
+        self.timer.stop()
+        self.hist_timer.stop()
+        self.label_timer.stop()
+        self.unsubscribe()
+        self.keepRecord()
         # ---  --- #
         self.isOn = False
 
-    def start_continuous_view_qthread(self):
-        # ---  --- #
-        self.thread = QThread()
-        self.thread.setTerminationEnabled(True)
-        # --- connect --- #
-        self.contview.moveToThread(self.thread)
-        self.thread.started.connect(self.contview.startFeed)
-        self.contview.newshot.connect(self.update_image)
-        self.contview.finished.connect(self.thread.quit)
-        # ---  --- #
-        self.thread.start()
-
-    def stop_continuous_view_qthread(self):
-        self.contview.stopFeed()
-
-    def start_continuous_view_qtimer(self):
-        # ---  --- #
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(1e3/self.fps) #ms
-
-    def stop_continuous_view_qtimer(self):
-        self.timer.stop()
-
     def changeCameraStyle(self):
-        self.camera.stop_video()
+        self.unsubscribe() # the camera stops if no other view uses it
         # ---  --- #
         indx = self.which_camera.currentIndex()
         if   indx == 0:
@@ -280,8 +610,8 @@ class CameraDisplay(QWidget):
             self.exposure.setEnabled(True)
             self.cam_framerate.setEnabled(True)
             self.pixelclock.setEnabled(True)
+            self.pixel_format.setEnabled(True)
         elif indx == 1:
-            self.camera.stop_video()
             dir_path    = QFileDialog().getExistingDirectory()
             self.log.addText('NEW DIR PATH: {}'.format(dir_path))
             self.simu_camera.setDirectoryPath( dir_path )
@@ -291,12 +621,63 @@ class CameraDisplay(QWidget):
             self.exposure.setEnabled(False)
             self.cam_framerate.setEnabled(False)
             self.pixelclock.setEnabled(False)
+            self.pixel_format.setEnabled(False)
+        # ---  --- #
+        self.settings.setCamera( self.camera )
+        self.planner.camera = self.camera
+        self.autoexposure.camera = self.camera
+        self.updatePixelClockRange()
+        self.setLevelsFromCamera()
+        if self.isOn:
+            self.subscribe()
+
+def benchmark_rendering(width=1280, height=1024, frame_number=100):
+    '''
+    Time per frame of the former display path (ImageView.setImage of the
+    transposed frame, histogram included) and of CameraDisplay.drawFrame: at
+    full resolution, in a window half the frame size (block-reduced tile)
+    and zoomed in. Needs a QApplication.
+    '''
+    frames = np.random.default_rng(0).integers(0, 256, (8, height, width), dtype=np.uint8)
+    view   = pg.ImageView()
+    item   = view.getImageItem()
+    start  = time.perf_counter()
+    for k in range(frame_number):
+        view.setImage(frames[k%8].T, autoHistogramRange=False, autoLevels=False)
+        item.render()
+    former = (time.perf_counter() - start) / frame_number
+    # ---  --- #
+    display = CameraDisplay(SyntheticCamera(width=width, height=height), fps=10)
+    def timeDrawFrame():
+        start = time.perf_counter()
+        for k in range(frame_number):
+            display.drawFrame(frames[k%8])
+            display.image_item.render()
+        return (time.perf_counter() - start) / frame_number
+    # --- in a window larger than the frame, then smaller, then zoomed in --- #
+    display.image_view.setMinimumSize(100, 100)
+    display.resize(width + 300, height + 300)
+    display.show()
+    QApplication.processEvents()
+    direct  = timeDrawFrame()
+    display.resize(width//2, height//2)
+    QApplication.processEvents()
+    reduced = timeDrawFrame()
+    display.image_view.getView().setRange(QRectF(width//4, height//4, width//8, height//8), padding=0)
+    zoomed  = timeDrawFrame()
+    print('{0}x{1} uint8: ImageView.setImage {2:.2f} ms/frame, drawFrame {3:.2f} ms/frame'.format(width, height, former*1e3, direct*1e3))
+    print('drawFrame in a {0}x{1} window {2:.2f} ms/frame, zoomed on 1/8 of the width {3:.2f} ms/frame'.format(width//2, height//2, reduced*1e3, zoomed*1e3))
+    return former, direct, reduced, zoomed
 
 #########################################################################################################################
 # CODE
 #########################################################################################################################
 if __name__ == '__main__':
     print('STARTING')
+    if 'benchmark' in sys.argv[1:]:
+        app = QApplication([])
+        benchmark_rendering()
+        sys.exit()
     dir_path = '/home/cgou/ENS/STAGE/M2--stage/Camera_acquisition/Miscellaneous/Camera_views/'
     camera   = Camera(cam_id=0)
     if not camera.isCameraInit:
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import threading
+
+from PyQt5.QtCore    import QObject, pyqtSignal
+
+
+from s_Camera_class                   import Camera
+from s_SimuCamera_class               import SimuCamera
+from s_SyntheticCamera_class          import SyntheticCamera
+from s_Frame_class                    import HostClock
+from s_Miscellaneous_functions        import get_camera_list
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class CameraManager(QObject):
+    '''
+    Keep track of all the connected cameras, by device id (unique, unlike
+    the camera id which is 1 for all the cameras as shipped).
+        - refresh() enumerates the devices with is_GetCameraList
+        - open(device_id) opens one camera in a background thread, opened is
+          emitted when done, and the camera only logs to log from then on
+          (printing before), as log is a widget of the GUI thread
+        - start_all()/stop_all() run one acquisition thread per opened camera,
+          through the FrameHub of each camera so that the tabs showing it
+          keep running after stop_all()
+    The simulated cameras have the negative ids -1 (SimuCamera) and -2
+    (SyntheticCamera).
+    The frames of all the cameras are stamped with their device id (source)
+    and their acquisition time mapped on the common host timebase
+    (time.perf_counter) in synced_time, so that frames of several cameras
+    can be compared in time. Their timestamp is left as it is, e.g. the
+    recorded one of a SimuCamera replay.
+    '''
+    opened = pyqtSignal(int, bool) # device_id, is the camera initialised
+
+    def __init__(self, log=None, simu_path=None):
+        super().__init__()
+        self.log       = log
+        self.simu_path = simu_path # directory of the SimuCamera used when no device is found
+        self.devices   = []
+        self.cameras   = {}
+        self.clocks    = {}
+        self.openers   = {}
+        self.started   = set() # cameras started by start_all
+        self.lock      = threading.Lock()
+        self.opened.connect( self.attachLog )
+
+    def addToLog(self, txt):
+        if self.log != None:
+            self.log.addText(txt)
+        else:
+            print(txt)
+
+    def refresh(self):
+        '''
+        Enumerate the connected devices and return them, see get_camera_list.
+        '''
+        try:
+            self.devices = get_camera_list()
+        except Exception as err:
+            self.addToLog('Error: in CameraManager.refresh.\n{}'.format(err))
+            self.devices = []
+        return self.devices
+
+    def open(self, device_id, wait=False):
+        '''
+        Open the camera device_id in a background thread, or right away if wait.
+        The opened signal is emitted once the camera is initialised.
+        '''
+        with self.lock:
+            if device_id in self.cameras or device_id in self.openers:
+                return None
+            opener = threading.Thread(target=self._open, args=(device_id,), name='Camera {} opener'.format(device_id), daemon=True)
+            self.openers[device_id] = opener
+        opener.start()
+        if wait:
+            opener.join()
+
+    def open_all(self):
+        for device in self.refresh():
+            if not device['in_use']:
+                self.open(device['device_id'])
+
+    def open_simulation(self, device_id=-1):
+        '''
+        Add a SimuCamera reading the images of simu_path.
+        '''
+        camera = SimuCamera(device_id, directory_path=self.simu_path, log=self.log)
+        self._register(device_id, camera)
+        return camera
+
+    def open_synthetic(self, device_id=-2, **kwargs):
+        '''
+        Add a SyntheticCamera, kwargs being its resolution, fps, seed...
+        '''
+        camera = SyntheticCamera(device_id, log=self.log, **kwargs)
+        self._register(device_id, camera)
+        return camera
+
+    def _open(self, device_id):
+        camera = Camera(device_id=device_id, log=None)
+        with self.lock:
+            del self.openers[device_id]
+        if camera.isCameraInit:
+            self._register(device_id, camera)
+        self.opened.emit(device_id, camera.isCameraInit)
+
+    def attachLog(self, device_id, isCameraInit):
+        '''
+        Slot of opened, run in the GUI thread.
+        '''
+        camera = self.cameras.get(device_id)
+        if camera is not None:
+            camera.log = self.log
+        elif not isCameraInit:
+            self.addToLog('Error: camera {} could not be opened.'.format(device_id))
+
+    def _register(self, device_id, camera):
+        with self.lock:
+            self.cameras[device_id] = camera
+            self.clocks[device_id]  = HostClock()
+        camera.on_frame = lambda frame: self.publish(device_id, frame)
+
+    def get_camera(self, device_id):
+        return self.cameras.get(device_id)
+
+    def publish(self, device_id, frame):
+        '''
+        Called from the acquisition thread of camera device_id with each Frame.
+        '''
+        frame.source      = device_id
+        frame.synced_time = self.clocks[device_id].to_host(frame)
+
+    def start_all(self):
+        for device_id, camera in list(self.cameras.items()):
+            if device_id not in self.started:
+                self.started.add(device_id)
+                camera.get_hub().start()
+
+    def stop_all(self):
+        for device_id, camera in list(self.cameras.items()):
+            if device_id in self.started:
+                self.started.discard(device_id)
+                camera.get_hub().stop()
+
+    def close(self, device_id):
+        camera = self.cameras.pop(device_id, None)
+        if camera is None:
+            return None
+        self.started.discard(device_id)
+        camera.close_camera()
+        with self.lock:
+            self.clocks.pop(device_id, None)
+
+    def close_all(self):
+        for device_id in list(self.cameras):
+            self.close(device_id)
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    manager = CameraManager()
+    for device in manager.refresh():
+        print(device)
+    print('FINISHED')
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+from PyQt5.QtCore    import QObject, QTimer, pyqtSignal
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class CameraSettings(QObject):
+    '''
+    Last known settings of a camera, and the changes waiting to be applied.
+    The widgets call request(name, value) and listen to changed: the requests
+    made within delay ms are applied together, in the order of APPLY_ORDER
+    since the frame rate range depends on the pixel clock and the exposure
+    range on the frame rate, then the settings are read back once.
+    A batch is run by camera.submit, i.e. between two frames of the
+    acquisition thread during a video, so the signals may come from that
+    thread and must be connected to slots of GUI objects only.
+    '''
+    APPLY_ORDER = ('pixelclock', 'framerate', 'exposure', 'gain')
+    changed     = pyqtSignal(dict) # the values read back after a batch
+    applied     = pyqtSignal(dict) # the values requested in a batch
+
+    def __init__(self, camera, log=None, delay=50):
+        super().__init__()
+        self.camera  = camera
+        self.log     = log
+        self.values  = {'pixelclock': None, 'framerate': None, 'exposure': None, 'gain': None}
+        self.pending = {}
+        self.timer   = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay) # ms
+        self.timer.timeout.connect( self.apply )
+        self.applied.connect( self.logApplied )
+
+    def addToLog(self, txt):
+        if self.log != None:
+            self.log.addText(txt)
+        else:
+            print(txt)
+
+    def setCamera(self, camera):
+        self.timer.stop()
+        self.pending = {}
+        self.camera  = camera
+        self.camera.submit(self.readBack)
+
+    def request(self, name, value):
+        '''
+        Ask for a new value, applied with the other requests of the batch.
+        '''
+        if name not in self.values:
+            raise KeyError('Unknown camera setting: {}'.format(name))
+        if name not in self.pending and self.values[name] == value:
+            return None
+        self.pending[name] = value
+        self.timer.start()
+
+    def apply(self):
+        '''
+        Send the pending values to the camera, then read the settings back.
+        Return the Future of the batch, None if nothing was pending.
+        '''
+        self.timer.stop()
+        pending      = self.pending
+        self.pending = {}
+        if len(pending) == 0:
+            return None
+        return self.camera.submit(self.applyBatch, pending)
+
+    def applyBatch(self, pending):
+        setters = {'pixelclock': lambda val: self.camera.setPixelClock( int(val) ),
+                   'framerate' : self.camera.setFrameRate,
+                   'exposure'  : self.camera.setExposure,
+                   'gain'      : self.camera.setHarwareGain}
+        for name in self.APPLY_ORDER:
+            if name in pending:
+                setters[name]( pending[name] )
+        self.readBack()
+        self.applied.emit(pending)
+        return dict(self.values)
+
+    def logApplied(self, pending):
+        self.addToLog('New camera settings: ' + ', '.join('{0} {1}'.format(name, self.values[name]) for name in self.APPLY_ORDER if name in pending))
+
+    def readBack(self):
+        '''
+        Single read of the settings the driver actually applied.
+        '''
+        self.values['pixelclock'] = self.camera.getPixelClock()
+        self.values['framerate']  = self.camera.getFrameRate()
+        self.values['exposure']   = self.camera.getExposure()
+        if hasattr(self.camera, 'getHardwareGain'):
+            self.values['gain']   = self.camera.getHardwareGain()
+        self.changed.emit( dict(self.values) )
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    print('FINISHED')
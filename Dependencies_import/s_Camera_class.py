@@ -22,21 +22,80 @@ import faulthandler
 #faulthandler.enable()
 
 
-from s_Miscellaneous_functions        import get_bits_per_pixel
+from s_Miscellaneous_functions        import get_bits_per_pixel, get_bit_depth, get_pixel_dtype
+from s_Workers_class                  import allocate_frame_stack, movie_statistics, timestamps_path, MOVIE_MEMORY_BUDGET
+from s_CameraBackend_class            import CameraBackend
+from s_Frame_class                    import Frame, FrameCounter
 
 
 import time
+import threading
 #########################################################################################################################
 # FUNCTIONS
 #########################################################################################################################
 
-class Camera:
+class Camera(CameraBackend):
+    PIXEL_FORMATS = {'mono8' : ueye.IS_CM_MONO8,
+                     'raw8'  : ueye.IS_CM_SENSOR_RAW8,
+                     'raw10' : ueye.IS_CM_SENSOR_RAW10,
+                     'raw12' : ueye.IS_CM_SENSOR_RAW12,
+                     'bgr8'  : ueye.IS_CM_BGR8_PACKED}
+    FREE_BUFFERS  = 2 # buffers of the ring always left to the driver, see get_frame_record
     # ~~~~~~~~~~~~~~~~~~~~~~~~ #
     class ImageBuffer:
         def __init__(self):
             self.mem_ptr = ueye.c_mem_p()
             self.mem_id  = ueye.int()
     # ~~~~~~~~~~~~~~~~~~~~~~~~ #
+    class SequenceBuffer:
+        '''
+        Locked buffer of the image sequence, read as a numpy view (no copy).
+        The buffer is given back to the driver with is_UnlockSeqBuf when leaving
+        the with block, when release() is called, or when the last reference to
+        it, or to one of the arrays it returned, is dropped.
+        Arrays must not be used after the buffer is released.
+        A buffer dropped from the ring by alloc while locked is freed here.
+        '''
+        def __init__(self, camera, img_buffer):
+            self.camera   = camera
+            self.mem_ptr  = img_buffer.mem_ptr
+            self.mem_id   = img_buffer.mem_id
+            self.isLocked = True
+            with camera.view_lock:
+                camera.locked_views.add(self.mem_id.value)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.release()
+
+        def __del__(self):
+            self.release()
+
+        def asarray(self):
+            '''
+            Return the image as a 2d (or 3d for color modes) view on the buffer.
+            '''
+            size = self.camera.pitch * self.camera.frame_height
+            raw  = (ctypes.c_ubyte * size).from_address(self.mem_ptr.value)
+            raw._owner = self # the buffer stays locked as long as a view is alive
+            return self.camera.from_1d_to_2d_image(np.frombuffer(raw, dtype=np.uint8), pitch=self.camera.pitch)
+
+        def release(self):
+            if not self.isLocked:
+                return None
+            self.isLocked = False
+            with self.camera.view_lock:
+                self.camera.locked_views.discard(self.mem_id.value)
+                isRetired = self.camera.retired_buffers.pop(self.mem_id.value, None) is not None
+            if self.camera.cam is None:
+                return None
+            if isRetired:
+                ueye.is_FreeImageMem(self.camera.cam, self.mem_ptr, self.mem_id)
+            else:
+                ueye.is_UnlockSeqBuf(self.camera.cam, self.mem_id, self.mem_ptr)
+    # ~~~~~~~~~~~~~~~~~~~~~~~~ #
     class Rect:
         def __init__(self, x=0, y=0, width=0, height=0):
             self.x = x
@@ -50,12 +109,35 @@ class Camera:
         def __str__(self):
             return "Err: " + str(self.error_code)
     # ~~~~~~~~~~~~~~~~~~~~~~~~ #
-    def __init__(self, cam_id=0, log=None, fps=10., default=True):
+    def __init__(self, cam_id=0, log=None, fps=10., default=True, pixel_format='mono8', device_id=None):
+        '''
+        pixel_format is one of the PIXEL_FORMATS keys. The mono and raw formats
+        transfer one channel per pixel, the raw10/12 ones on 16 bits.
+        The camera opened is the device device_id if given (see
+        get_camera_list), else the first free one with the camera id cam_id,
+        any if 0.
+        '''
         self.cam_id  = cam_id
+        self.device_id = device_id
         self.log     = log
         self.cam     = None
         self.fps     = fps
-        self.colorMode = ueye.IS_CM_BGR8_PACKED
+        self.pixel_format = pixel_format
+        self.colorMode = self.PIXEL_FORMATS[pixel_format]
+        self.max_value = 255
+        self.frame_queue = None
+        self.acquisition = None
+        self.on_frame    = None # called with each acquired Frame, see CameraManager
+        self.settings_generation = 0
+        self.frame_counter = FrameCounter()
+        self.frame_event   = False # True when waitForNextFrame blocks on IS_SET_EVENT_FRAME
+        self.locked_views  = set() # mem_id of the buffers held by a SequenceBuffer
+        self.retired_buffers = {}  # mem_id: buffer left out of the ring by alloc, freed once unlocked
+        self.view_lock     = threading.Lock()
+        # --- last known settings, stamped on each Frame --- #
+        self.exposure   = None
+        self.gain       = None
+        self.pixelclock = None
         # ---  --- #
         self.initialize()
         # ---  --- #
@@ -69,8 +151,13 @@ class Camera:
 
     def initialize(self):
         # --- using pyueye --- #
-        self.cam          = ueye.HIDS(self.cam_id)
+        if self.device_id is None:
+            self.cam      = ueye.HIDS(self.cam_id)
+        else:
+            self.cam      = ueye.HIDS(self.device_id | ueye.IS_USE_DEVICE_ID)
         self.frame_buffer = []
+        self.buffer_format = None
+        self.buffer_count  = 0
         # ---  --- #
         ret = ueye.is_InitCamera(self.cam, None) # init camera and return 0,1 according to if it worked
         if ret != ueye.IS_SUCCESS:
@@ -83,10 +170,15 @@ class Camera:
 
     def initDefault(self):
         self.set_colormode()
-        self.set_aoi(0,0, 1280,1024)
+        self.set_aoi(0,0, *self.get_sensor_size())
         self.alloc()
+        # --- fill the settings cache --- #
+        self.getExposure()
+        self.getHardwareGain()
+        self.getPixelClock()
 
     def close_camera(self):
+        self.stop_acquisition()
         ret = None
         if self.cam is not None:
                 ret = ueye.is_ExitCamera(self.cam)
@@ -108,26 +200,59 @@ class Camera:
         info_display += '\nReserved : {}'.format(cam_info.Reserved)
         return info_display
 
-    def acquire_movie(self, num_frames):
+    def acquire_movie(self, num_frames, memory_budget=MOVIE_MEMORY_BUDGET, filename=None, timeout=1000):
         '''
-        Return the list of frame array that consitutes the movie.
+        Burst acquisition of num_frames frames, copied straight from the
+        driver buffers into a preallocated (num_frames, H, W) array, or a
+        np.memmap on filename when larger than memory_budget (in bytes).
+        The frames are stored in the camera pixel format, without conversion.
+        The achieved fps and the dropped frames are logged and kept in
+        self.movie_stats, the frame times (in s) in self.movie_times, saved
+        next to the movie when it is a memmap (see timestamps_path).
+        Return the movie, truncated if the camera stopped delivering frames
+        for more than timeout ms.
         '''
-        self.capture_video()
-        time.sleep(1.)
+        wasOn = self.acquisition is not None
+        self.stop_acquisition()
+        movie   = None
+        times   = np.zeros(num_frames)
+        counter = FrameCounter()
+        first_time = last_time = time.perf_counter()
+        i = 0
         # ---  --- #
-        movie = []
-        for _ in range(num_frames):
-            movie.append(self.get_frame())
+        self.enable_frame_event()
+        self.capture_video()
+        try:
+            while i < num_frames:
+                if not self.waitForNextFrame(timeout):
+                    self.addToLog('Error: in acquire_movie. No frame for {0} ms, movie stopped at {1} frames.'.format(timeout, i))
+                    break
+                frame_number, timestamp = self.get_image_info()
+                last_time = time.perf_counter() if timestamp is None else timestamp
+                with self.get_frame_view() as view:
+                    data = view.asarray()
+                    if movie is None:
+                        movie = allocate_frame_stack(num_frames, data.shape, data.dtype, memory_budget, filename)
+                    movie[i] = data
+                if i == 0:
+                    first_time = last_time
+                times[i] = last_time - first_time
+                counter.update(i if frame_number is None else frame_number)
+                i += 1
+        finally:
+            self.stop_video()
+            self.disable_frame_event()
         # ---  --- #
-        self.stop_video()
-        time.sleep(1.)
-        return movie
-
-    def addToLog(self, txt):
-        if self.log != None:
-            self.log.addText(txt)
-        else:
-            print(txt)
+        self.movie_times = times[:i]
+        if isinstance(movie, np.memmap):
+            np.save(timestamps_path(movie.filename), self.movie_times)
+        self.movie_stats = movie_statistics(i, first_time, last_time, counter.dropped)
+        self.addToLog('Movie: {frames} frames at {fps:.2f} fps, {dropped} dropped.'.format(**self.movie_stats))
+        if wasOn:
+            self.start_acquisition()
+        if movie is None:
+            return np.empty((0, self.frame_height, self.frame_width), dtype=self.pixel_dtype)
+        return movie[:i]
 
     def check(self, state, funct_name):
         if state != ueye.IS_SUCCESS:
@@ -155,17 +280,99 @@ class Camera:
         #print('SET AOI: ', hasWorked )
         return hasWorked
 
-    def alloc(self, buffer_count=3):
+    def get_sensor_size(self):
+        sensor_info = ueye.SENSORINFO()
+        hasWorked   = ueye.is_GetSensorInfo(self.cam, sensor_info)
+        self.check( hasWorked, 'is_GetSensorInfo')
+        return sensor_info.nMaxWidth.value, sensor_info.nMaxHeight.value
+
+    def get_aoi_increments(self):
+        '''
+        Return the position step, size step and minimal size of the AOI, as
+        (x, y) pairs in pixels.
+        '''
+        pos_inc, size_inc, size_min = ueye.IS_POINT_2D(), ueye.IS_SIZE_2D(), ueye.IS_SIZE_2D()
+        ueye.is_AOI(self.cam, ueye.IS_AOI_IMAGE_GET_POS_INC , pos_inc , ueye.sizeof(pos_inc))
+        ueye.is_AOI(self.cam, ueye.IS_AOI_IMAGE_GET_SIZE_INC, size_inc, ueye.sizeof(size_inc))
+        ueye.is_AOI(self.cam, ueye.IS_AOI_IMAGE_GET_SIZE_MIN, size_min, ueye.sizeof(size_min))
+        return ((max(pos_inc.s32X.value, 1)  , max(pos_inc.s32Y.value, 1)),
+                (max(size_inc.s32Width.value, 1), max(size_inc.s32Height.value, 1)),
+                (size_min.s32Width.value     , size_min.s32Height.value))
+
+    def set_roi(self, x, y, width, height, max_fps=True):
+        '''
+        Shrink the AOI of the sensor to the rectangle (in sensor pixels),
+        enlarged to the AOI steps of the camera, and moved back inside the
+        sensor at its right and bottom edges. The ring buffers are only
+        reallocated if the frame size changes. With max_fps the frame rate is
+        raised to the maximum allowed by the new AOI. The acquisition is
+        restarted even if the AOI is refused.
+        Return the AOI applied, as (x, y, width, height).
+        '''
+        (px, py), (sx, sy), (wmin, hmin) = self.get_aoi_increments()
+        sensor_w, sensor_h = self.get_sensor_size()
+        x0, y0 = int(max(x, 0))//px*px, int(max(y, 0))//py*py
+        x1, y1 = int(np.ceil(x+width)), int(np.ceil(y+height))
+        width  = min(max(-(-(x1-x0)//sx)*sx, wmin), sensor_w//sx*sx)
+        height = min(max(-(-(y1-y0)//sy)*sy, hmin), sensor_h//sy*sy)
+        x0, y0 = min(x0, sensor_w - width)//px*px, min(y0, sensor_h - height)//py*py
+        # ---  --- #
+        wasOn = self.acquisition is not None
+        self.stop_acquisition()
+        try:
+            self.check( self.set_aoi(x0, y0, width, height), 'is_AOI')
+            self.alloc()
+            if max_fps:
+                ftmin, _, _ = self.getFrameTimeRange()
+                self.setFrameRate( 1./ftmin )
+            self.getExposure()
+            self.settings_generation += 1
+        finally:
+            if wasOn:
+                self.start_acquisition()
+        # ---  --- #
+        aoi = self.get_aoi()
+        self.addToLog('New AOI: {0}, {1:.2f} fps'.format(aoi, self.getFrameRate()))
+        return aoi
+
+    def reset_roi(self, max_fps=True):
+        return self.set_roi(0, 0, *self.get_sensor_size(), max_fps=max_fps)
+
+    def alloc(self, buffer_count=6):
         '''
         Initialization of the ring buffer.
+        Buffers held as SequenceBuffer views are locked and skipped by the
+        driver, so the ring has to be larger than the number of views in use.
+        The buffers are kept when their size already fits the AOI and the
+        color mode. The ones still locked are only freed when their view is
+        released.
         '''
         rec_aoi    = self.Rect( *self.get_aoi() )
         color_mode = ueye.is_SetColorMode(self.cam, ueye.IS_GET_COLOR_MODE)
         self.bpp   = get_bits_per_pixel( color_mode )
+        self.pixel_dtype  = get_pixel_dtype( color_mode )
+        self.bit_depth    = get_bit_depth( color_mode )
+        self.max_value    = 2**self.bit_depth - 1
+        self.channels     = self.bpp // (8*np.dtype(self.pixel_dtype).itemsize)
+        self.frame_width  = rec_aoi.width
+        self.frame_height = rec_aoi.height
+        buffer_format     = (rec_aoi.width, rec_aoi.height, self.bpp, buffer_count)
+        if len(self.frame_buffer) != 0 and buffer_format == self.buffer_format:
+            return None
+        self.buffer_format = buffer_format
         # --- freeing the memory from previous buffer --- #
+        if len(self.frame_buffer) != 0:
+            ueye.is_ExitImageQueue(self.cam)
+            ueye.is_ClearSequence(self.cam)
         for buff in self.frame_buffer:
+            with self.view_lock:
+                if buff.mem_id.value in self.locked_views:
+                    self.retired_buffers[buff.mem_id.value] = buff
+                    continue
             hasWorked = ueye.is_FreeImageMem(self.cam, buff.mem_ptr, buff.mem_id)
             self.check( hasWorked, 'is_FreeImageMem')
+        self.frame_buffer = []
+        self.buffer_count = buffer_count
         # --- allocate memory to buffer --- #
         for i in range(buffer_count):
                 buff = self.ImageBuffer()
@@ -178,14 +385,54 @@ class Camera:
         # ---  --- #
         hasWorked = ueye.is_InitImageQueue(self.cam, 0) # init and return the success of image queued.
         self.check( hasWorked , 'is_InitImageQueue')
-        # ---  --- #
+        # --- line length in byte, identical for all buffers of the sequence --- #
         self.img_buffer = self.frame_buffer[-1]
+        self.img_locked = False
+        x, y, bits, pitch = ueye.int(), ueye.int(), ueye.int(), ueye.int()
+        hasWorked = ueye.is_InquireImageMem(self.cam, self.img_buffer.mem_ptr, self.img_buffer.mem_id, x, y, bits, pitch)
+        self.check( hasWorked, 'is_InquireImageMem')
+        self.pitch = pitch.value
 
-    def waitForNextFrame(self):
-        self.timeout    = 1000
+    def enable_frame_event(self):
+        '''
+        Let waitForNextFrame block on the driver frame event, so that the
+        acquisition wakes up as soon as a frame is there and never otherwise.
+        '''
+        hasWorked = ueye.is_EnableEvent(self.cam, ueye.IS_SET_EVENT_FRAME)
+        self.frame_event = hasWorked == ueye.IS_SUCCESS
+        if not self.frame_event:
+            self.addToLog('Frame event not available (err {}), waiting on the image queue instead.'.format(hasWorked))
+
+    def disable_frame_event(self):
+        if not self.frame_event:
+            return None
+        self.frame_event = False
+        hasWorked = ueye.is_DisableEvent(self.cam, ueye.IS_SET_EVENT_FRAME)
+        self.check( hasWorked, 'is_DisableEvent')
+
+    def waitForNextFrame(self, timeout=1000):
+        '''
+        Block until the next image of the queue is available (timeout in ms).
+        The buffer is then locked and becomes the current img_buffer.
+        With the frame event enabled the images already in the queue are taken
+        first, the event being waited on only when the queue is empty: several
+        frames can be signaled by a single event, and an event can be left set
+        by a frame already taken.
+        '''
+        self.timeout    = timeout
         self.img_buffer = self.ImageBuffer()#self.frame_buffer[-1]
-        isWaiting       = ueye.is_WaitForNextImage(self.cam, self.timeout, self.img_buffer.mem_ptr, self.img_buffer.mem_id)
-        print('WAIT FOR NEXT IMG: {0}, IS_SUCCESS: {1}'.format(isWaiting, ueye.IS_SUCCESS) )
+        if self.frame_event:
+            deadline  = time.perf_counter() + timeout*1e-3
+            isWaiting = ueye.is_WaitForNextImage(self.cam, 0, self.img_buffer.mem_ptr, self.img_buffer.mem_id)
+            while isWaiting != ueye.IS_SUCCESS:
+                remaining = int((deadline - time.perf_counter())*1e3)
+                if remaining <= 0 or ueye.is_WaitEvent(self.cam, ueye.IS_SET_EVENT_FRAME, remaining) != ueye.IS_SUCCESS:
+                    self.img_locked = False
+                    return False
+                isWaiting = ueye.is_WaitForNextImage(self.cam, 0, self.img_buffer.mem_ptr, self.img_buffer.mem_id)
+        else:
+            isWaiting = ueye.is_WaitForNextImage(self.cam, self.timeout, self.img_buffer.mem_ptr, self.img_buffer.mem_id)
+        self.img_locked = isWaiting == ueye.IS_SUCCESS
         if isWaiting == ueye.IS_SUCCESS:
             return True
         else:
@@ -199,39 +446,86 @@ class Camera:
         hasWorked = ueye.is_UnlockSeqBuf(self.cam, self.img_buffer.mem_id, self.img_buffer.mem_ptr)
         self.check( hasWorked, 'is_UnlockSeqBuf')
 
-    def getImageData(self):
-        # --- set AOI --- #
-        rect_aoi = ueye.IS_RECT()
-        hasWorked= ueye.is_AOI(self.cam, ueye.IS_AOI_IMAGE_GET_AOI, rect_aoi, ueye.sizeof(rect_aoi))
-        self.check( hasWorked, 'getImageData')
-        # ---  --- #
-        x        = ueye.int()
-        y        = ueye.int()
-        bits     = ueye.int()
-        pitch    = ueye.int()
-        self.frame_width  = rect_aoi.s32Width.value
-        self.frame_height = rect_aoi.s32Height.value
-        hasWorked= ueye.is_InquireImageMem(self.cam, self.img_buffer.mem_ptr, self.img_buffer.mem_id, x, y, bits, pitch)
-        self.check( hasWorked, 'getImageData')
-        self.imgdata = ueye.get_data(self.img_buffer.mem_ptr, self.frame_width, self.frame_height, bits, pitch, True)
-
-    def get_frame(self):
-        #self.lockBuffer() # seems to be unecessary
-        # ---  --- #
-        self.getImageData()
-        # --- convert 1D array to 2D wrt the data style (ie color or not) --- #
-        self.frame = self.from_1d_to_2d_image(self.imgdata) # reshape the image data as 1dimensional array
-        self.frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY) # make a gray image
-        # ---  --- #
-        self.unlockBuffer()
+    def get_frame_view(self):
+        '''
+        Return the current image buffer as a locked SequenceBuffer, whose
+        asarray() gives the image without any copy. Use it in a with block, or
+        drop every reference to it, so that the buffer goes back to the driver.
+        '''
+        if not self.img_locked:
+            self.lockBuffer()
+        self.img_locked = False # the SequenceBuffer is now in charge of the unlock
+        return self.SequenceBuffer(self, self.img_buffer)
+
+    def get_frame(self, color=False):
+        '''
+        Return a copy of the current image, the buffer being unlocked.
+        The image is gray unless color is True; the color conversion is only
+        made when the pixel format does not already match what is asked.
+        '''
+        with self.get_frame_view() as view:
+            data = view.asarray()
+            if   self.channels == 1 and not color:
+                self.frame = np.array(data)
+            elif self.channels == 1:
+                self.frame = cv2.cvtColor(data, cv2.COLOR_GRAY2BGR)
+            elif color:
+                self.frame = np.array(data)
+            else:
+                self.frame = cv2.cvtColor(data, cv2.COLOR_BGR2GRAY) # make a gray image
         return self.frame
 
-    def from_1d_to_2d_image(self, img_data):
-        channels = int((7 + self.bpp) / 8) # with self.bpp from alloc with get_bits_per_pixel( color_mode )
-        if channels > 1:
-            return np.reshape(img_data, (self.frame_height, self.frame_width, channels))
+    def get_image_info(self):
+        '''
+        Return the device frame number and timestamp (in s) of the current
+        image buffer, (None, None) if the driver cannot tell.
+        '''
+        img_info  = ueye.UEYEIMAGEINFO()
+        hasWorked = ueye.is_GetImageInfo(self.cam, self.img_buffer.mem_id, img_info, ueye.sizeof(img_info))
+        if hasWorked != ueye.IS_SUCCESS:
+            return None, None
+        return img_info.u64FrameNumber.value, img_info.u64TimestampDevice.value * 1e-7 # device clock in 0.1us
+
+    def get_frame_record(self, color=False):
+        '''
+        Return the current image as a Frame, with the device timestamp and
+        frame number from is_GetImageInfo and the settings in use.
+        Gaps in the frame numbers are counted in frame_counter.dropped.
+        When no color conversion is needed the data is a view on the locked
+        buffer, given back to the driver by Frame.release(). The image is
+        copied instead when the holders of the frames already lock all but
+        FREE_BUFFERS buffers of the ring.
+        '''
+        host_time = time.perf_counter()
+        frame_number, timestamp = self.get_image_info()
+        if frame_number is None:
+            frame_number = self.frame_counter.received
+        # ---  --- #
+        buffer = None
+        isConverted = (self.channels == 1) == color
+        if isConverted or len(self.locked_views) >= self.buffer_count - self.FREE_BUFFERS:
+            data = self.get_frame(color=color)
+        else:
+            buffer = self.get_frame_view()
+            data   = buffer.asarray()
+        self.frame_counter.update(frame_number)
+        return Frame(data, frame_number=frame_number, timestamp=timestamp, host_time=host_time, buffer=buffer,
+                     exposure=self.exposure, gain=self.gain, pixelclock=self.pixelclock, generation=self.settings_generation)
+
+    def from_1d_to_2d_image(self, img_data, pitch=None):
+        '''
+        Reshape the 1d byte data as a 2d (or 3d for color) array of pixel_dtype.
+        When the line length in byte (pitch) is given, the padding at the end
+        of each line is dropped without copying the data.
+        '''
+        line_size = self.frame_width * self.channels * np.dtype(self.pixel_dtype).itemsize
+        if pitch is None:
+            pitch = line_size
+        img_data = np.reshape(img_data, (self.frame_height, pitch))[:, :line_size].view(self.pixel_dtype)
+        if self.channels > 1:
+            return np.reshape(img_data, (self.frame_height, self.frame_width, self.channels))
         else:
-            return np.reshape(img_data, (self.frame_height, self.frame_width))
+            return img_data
 
     def capture_video(self, wait=False):
         wait_param = ueye.IS_WAIT if wait else ueye.IS_DONT_WAIT
@@ -255,6 +549,22 @@ class Camera:
         self.colorMode = colormode
         self.set_colormode()
 
+    def set_pixel_format(self, pixel_format):
+        '''
+        Change the pixel format (key of PIXEL_FORMATS) and reallocate the
+        buffers accordingly. A running acquisition is restarted.
+        '''
+        wasOn = self.acquisition is not None
+        self.stop_acquisition()
+        # ---  --- #
+        self.pixel_format = pixel_format
+        self.change_colormode( self.PIXEL_FORMATS[pixel_format] )
+        self.alloc()
+        self.addToLog('Pixel format: {0}, {1} bits per pixel.'.format(pixel_format, self.bit_depth))
+        # ---  --- #
+        if wasOn:
+            self.start_acquisition()
+
     def getExposure(self):
         '''
         Exposure time in ms.
@@ -263,6 +573,7 @@ class Camera:
         val_size     = ctypes.c_int32( ctypes.sizeof(val_formated) )
         hasWorked = ueye.is_Exposure(self.cam, ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, val_formated, val_size)
         self.check( hasWorked, 'is_Exposure')
+        self.exposure = val_formated.value
         return val_formated.value
         #self.addToLog('is_Exposure has worked: {0}\n Value of exposure is: {1}, of size {2}.\nWanted value is: {3}'.format(hasWorked, val_formated, val_size, exp_val))
 
@@ -274,12 +585,21 @@ class Camera:
         val_size     = ctypes.c_int32( ctypes.sizeof(val_formated) )
         hasWorked = ueye.is_Exposure(self.cam, ueye.IS_EXPOSURE_CMD_SET_EXPOSURE, val_formated, val_size)
         self.check( hasWorked, 'is_Exposure')
+        self.exposure = val_formated.value # the driver writes back the exposure applied
         #self.addToLog('is_Exposure has worked: {0}\n Value of exposure is: {1}, of size {2}.\nWanted value is: {3}'.format(hasWorked, val_formated, val_size, exp_val))
 
     def setHarwareGain(self, gain_val):
         current_gain = ueye.is_SetHardwareGain(self.cam, ueye.IS_GET_MASTER_GAIN, ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER)
         hasWorked    = ueye.is_SetHardwareGain(self.cam, int(gain_val), ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER)
         self.check( hasWorked, 'is_SetHardwareGain')
+        self.gain = int(gain_val)
+
+    def getHardwareGain(self):
+        '''
+        Master gain, from 0 to 100.
+        '''
+        self.gain = ueye.is_SetHardwareGain(self.cam, ueye.IS_GET_MASTER_GAIN, ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER)
+        return self.gain
 
     def getFrameTimeRange(self):
         """
@@ -301,7 +621,8 @@ class Camera:
 
     def setFrameRate(self, fr):
         """
-        Note: values out of range are automatically clipped
+        Note: values out of range are automatically clipped, and so is the
+        exposure: read it back with getExposure (see CameraSettings)
         fr (0>float): framerate (in Hz) to be set
         return (0>float): actual framerate applied
         """
@@ -317,12 +638,32 @@ class Camera:
         pc = ctypes.c_uint32()
         hasWorked = ueye.is_PixelClock(self.cam, ueye.IS_PIXELCLOCK_CMD_GET, pc, ctypes.sizeof(pc))
         self.check( hasWorked, 'getPixelClock' )
+        self.pixelclock = pc.value
         return pc.value
 
+    def getPixelClockList(self):
+        """
+        return (list of int): the pixel clocks in MHz accepted by the camera, increasing
+        """
+        nbr = ctypes.c_uint32()
+        hasWorked = ueye.is_PixelClock(self.cam, ueye.IS_PIXELCLOCK_CMD_GET_NUMBER, nbr, ctypes.sizeof(nbr))
+        if hasWorked == ueye.IS_SUCCESS and nbr.value != 0:
+            clocks = (ctypes.c_uint32 * nbr.value)()
+            hasWorked = ueye.is_PixelClock(self.cam, ueye.IS_PIXELCLOCK_CMD_GET_LIST, clocks, ctypes.sizeof(clocks))
+            self.check( hasWorked, 'getPixelClockList' )
+            return sorted(clocks)
+        # --- continuous range --- #
+        clock_range = (ctypes.c_uint32 * 3)()
+        hasWorked = ueye.is_PixelClock(self.cam, ueye.IS_PIXELCLOCK_CMD_GET_RANGE, clock_range, ctypes.sizeof(clock_range))
+        self.check( hasWorked, 'getPixelClockList' )
+        cmin, cmax, cinc = clock_range
+        return list(range(cmin, cmax+1, max(cinc, 1)))
+
     def setPixelClock(self, pxl_clck):
         val_formated = ctypes.c_uint32(pxl_clck)
         hasWorked = ueye.is_PixelClock(self.cam, ueye.IS_PIXELCLOCK_CMD_SET, val_formated, ctypes.sizeof(val_formated))
         self.check( hasWorked, 'setPixelClock' )
+        self.pixelclock = int(pxl_clck)
 
 #########################################################################################################################
 # CODE
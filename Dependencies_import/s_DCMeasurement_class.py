@@ -57,7 +57,6 @@ class DCMeasurement(QWidget):
         self.camera    = camera
         if not self.camera.isCameraInit:
             self.camera.__init__(cam_id=0, log=self.log)
-        self.contview  = ContinuousView(fps=self.fps)
         self.qlabl_max = QLabel()
         # ---  --- #
         self.initUI()
@@ -95,7 +94,7 @@ class DCMeasurement(QWidget):
         self.setFittingMethod()
 
     def initView(self):
-        self.camera_view     = CameraDisplay(camera=self.camera, log=self.log)
+        self.camera_view     = CameraDisplay(camera=self.camera, log=self.log, policy='latest') # display only
         # ---  --- #
         self.camera_view.image_view.setMinimumWidth(600)
         self.camera_view.image_view.setMinimumHeight(200)
@@ -474,7 +473,6 @@ class DCMeasurement(QWidget):
 
     def setFPS(self):
         self.fps = self.fps_input.value()
-        self.contview.setFPS( self.fps )
         self.timer.setInterval(1e3/self.fps)
 
     def setFittingRate(self):
@@ -484,7 +482,7 @@ class DCMeasurement(QWidget):
         ind = self.normalise_hist.currentIndex()
         if   ind == 0:
             self.normalise = False
-            self.gaussianfit.setMaxAmp(255)
+            self.gaussianfit.setMaxAmp( self.camera_view.camera.max_value )
             #self.plot_hist.setYRange(0, 255)
             self.plot_hist.getViewBox().enableAutoRange(pg.ViewBox.YAxis, enable=True)
             #self.threshold.setValue(255)
@@ -577,12 +575,12 @@ class DCMeasurement(QWidget):
             self.updateRelativeHeightMatrix()
 
     def updatePlotHistogram(self):
-        frame = self.camera_view.frame
-        if type(frame) == type(None):
+        record = self.camera_view.frame_record
+        if type(record) == type(None):
             return None
         # ---  --- #
         # ---  --- #
-        ydata = np.sum(frame,axis=0)/frame.shape[0]
+        ydata = record.stats().column_means
         if self.normalise:
             try:
                 ydata = ydata/np.max(ydata)
@@ -0,0 +1,571 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import sys
+import types
+import ctypes
+import importlib
+import importlib.util
+import threading
+import collections
+import time
+
+import numpy as np
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+def load_pyueye_without_dll():
+    '''
+    Import pyueye.ueye with a DLL loader binding nothing: the types and
+    constants work, the driver functions raise NotImplementedError.
+    '''
+    if 'pyueye.ueye' in sys.modules:
+        return sys.modules['pyueye.ueye']
+    spec   = importlib.util.find_spec('pyueye')
+    if spec is None:
+        raise ImportError('pyueye is needed by the fake uEye driver.')
+    package          = types.ModuleType('pyueye')
+    package.__path__ = list(spec.submodule_search_locations)
+    sys.modules['pyueye'] = package
+    dll              = importlib.import_module('pyueye.dll')
+    dll.load_dll     = lambda *args, **kwargs: (lambda: None, lambda *args, **kwargs: None)
+    ueye             = importlib.import_module('pyueye.ueye')
+    package.ueye     = ueye
+    return ueye
+
+def install_fake_ueye(camera_number=1, **kwargs):
+    '''
+    Replace the driver functions of pyueye.ueye by a FakeUEye and return it.
+    kwargs are given to each FakeSensor.
+    '''
+    ueye   = load_pyueye_without_dll()
+    driver = FakeUEye(ueye, camera_number, **kwargs)
+    for name in FakeUEye.FUNCTIONS:
+        setattr(ueye, name, getattr(driver, name))
+    return driver
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FakeSensor:
+    '''
+    One emulated camera: settings, memory and the thread exposing the frames.
+    The frame time is (width + h_blank) * (height + v_blank) / pixel clock,
+    roughly the one of a 1280x1024 UI-3240 (60 fps at 86 MHz).
+    cam_id is the device id, unique, the camera id being 1 as shipped.
+    '''
+    def __init__(self, ueye, cam_id, width=1280, height=1024, pixelclocks=range(5, 87), h_blank=200, v_blank=30, open_delay=0.2, camera_id=1):
+        self.ueye       = ueye
+        self.cam_id     = cam_id
+        self.camera_id  = camera_id
+        self.serial     = '40{:08d}'.format(cam_id)
+        self.model      = 'FAKE-3240'
+        self.width      = width
+        self.height     = height
+        self.h_blank    = h_blank
+        self.v_blank    = v_blank
+        self.open_delay = open_delay # s, is_InitCamera takes about this long
+        self.pixelclocks= list(pixelclocks)
+        self.is_open    = False
+        # --- settings --- #
+        self.aoi        = [0, 0, width, height]
+        self.color_mode = ueye.IS_CM_MONO8
+        self.pixelclock = self.pixelclocks[len(self.pixelclocks)//2]
+        self.frame_time = self.getFrameTimeRange()[0]
+        self.exposure   = 10. # ms
+        self.gain       = 0
+        # --- memory --- #
+        self.memory     = {}   # mem_id: (ctypes buffer, width, height, bpp, pitch)
+        self.sequence   = []
+        self.queue      = collections.deque() # mem_id filled and not read yet
+        self.locked     = set()
+        self.image_info = {}   # mem_id: (frame number, device timestamp in 0.1us)
+        self.next_id    = 1
+        self.next_index = 0
+        self.pattern    = None
+        # --- video --- #
+        self.condition  = threading.Condition()
+        self.frame_event= threading.Event()
+        self.event_on   = False
+        self.thread     = None
+        self.must_stop  = threading.Event()
+        self.frame_number = 0
+        self.lost_frames  = 0
+        self.start_time   = time.perf_counter()
+
+    # --- timing model --- #
+    def getFrameTimeRange(self):
+        '''
+        Return min, max and step of the frame time in s.
+        '''
+        _, _, w, h = self.aoi
+        ftmin = (w + self.h_blank) * (h + self.v_blank) / (self.pixelclock * 1e6)
+        return ftmin, 10., 1e-5
+
+    def clampSettings(self):
+        ftmin, ftmax, _ = self.getFrameTimeRange()
+        self.frame_time = min(max(self.frame_time, ftmin), ftmax)
+        self.exposure   = min(max(self.exposure, 0.01), self.frame_time*1e3)
+
+    # --- pixels --- #
+    def makePattern(self, width, height, bpp, pitch):
+        '''
+        A few frames with moving gaussian spots, in the buffer layout.
+        '''
+        dtype   = np.uint16 if bpp == 16 else np.uint8
+        bits    = {self.ueye.IS_CM_SENSOR_RAW10: 10, self.ueye.IS_CM_SENSOR_RAW12: 12}.get(self.color_mode, 8)
+        channels= max(bpp // (8*np.dtype(dtype).itemsize), 1)
+        xx, yy  = np.arange(width), np.arange(height)
+        sigma   = width/40.
+        frames  = []
+        for k in range(4):
+            profile = sum(np.exp(-(xx - width*(n+1)/4. - 5*k)**2 / (2*sigma**2)) for n in range(3))
+            image   = np.outer(np.exp(-(yy - height/2.)**2 / (2*sigma**2)), profile)
+            image = image * 0.9 * (2**bits - 1)
+            image = np.repeat(image[:, :, None], channels, axis=2).astype(dtype)
+            line  = np.zeros((height, pitch), dtype=np.uint8)
+            line[:, :width*channels*np.dtype(dtype).itemsize] = image.reshape(height, -1).view(np.uint8)
+            frames.append(line)
+        return frames
+
+    def preparePattern(self, mem_id):
+        '''
+        Return the frames in the layout of the buffer mem_id, computed once
+        per buffer format.
+        '''
+        _, width, height, bpp, pitch = self.memory[mem_id]
+        key = (width, height, bpp, pitch, self.color_mode)
+        if self.pattern is None or self.pattern[0] != key:
+            self.pattern = (key, self.makePattern(width, height, bpp, pitch))
+        return self.pattern[1]
+
+    def exposeFrame(self):
+        '''
+        Write the next frame in the next free buffer of the sequence.
+        '''
+        self.frame_number += 1
+        timestamp = int((time.perf_counter() - self.start_time) * 1e7)
+        with self.condition:
+            free = [mem_id for mem_id in self.sequence if mem_id not in self.locked and mem_id not in self.queue]
+            if len(free) == 0:
+                self.lost_frames += 1 # no buffer: the frame is lost
+                return None
+            order  = self.sequence[self.next_index:] + self.sequence[:self.next_index]
+            mem_id = [mem_id for mem_id in order if mem_id in free][0]
+            self.next_index = (self.sequence.index(mem_id) + 1) % len(self.sequence)
+        # ---  --- #
+        buff   = self.memory[mem_id][0]
+        frames = self.preparePattern(mem_id)
+        ctypes.memmove(buff, frames[self.frame_number % len(frames)].ctypes.data, min(len(buff), frames[0].nbytes))
+        # ---  --- #
+        with self.condition:
+            self.image_info[mem_id] = (self.frame_number, timestamp)
+            self.queue.append(mem_id)
+            self.condition.notify_all()
+        if self.event_on:
+            self.frame_event.set()
+
+    def run(self):
+        next_time = time.perf_counter()
+        while not self.must_stop.is_set():
+            next_time += self.frame_time
+            delay = next_time - time.perf_counter()
+            if delay < -1.:
+                next_time = time.perf_counter()
+            if self.must_stop.wait( max(delay, 0.) ):
+                break
+            self.exposeFrame()
+
+    def startVideo(self):
+        if self.thread is not None:
+            return None
+        self.preparePattern(self.sequence[0]) # not in the timing of the first frames
+        self.must_stop.clear()
+        self.thread = threading.Thread(target=self.run, name='Fake uEye sensor {}'.format(self.cam_id), daemon=True)
+        self.thread.start()
+
+    def stopVideo(self):
+        if self.thread is None:
+            return None
+        self.must_stop.set()
+        self.thread.join()
+        self.thread = None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FakeUEye:
+    '''
+    In-process emulation of the uEye driver, to run the Camera class without a
+    camera (profiling, benchmarks, development away from the setup).
+
+        from s_FakeUEye_class import install_fake_ueye
+        driver = install_fake_ueye()          # before importing s_Camera_class
+        from s_Camera_class import Camera
+
+    The pyueye package is loaded without its DLL, so all its structures and
+    constants are the real ones, and the is_* functions used by this project are
+    replaced by the methods of a FakeUEye. The sensor runs in its own thread at
+    the frame rate the settings allow: a pixel clock and blanking model gives
+    the frame time, frames are written into the sequence buffers with memmove
+    like the DMA would, locked buffers are skipped and a frame without a free
+    buffer is lost (its frame number is skipped).
+    '''
+    FUNCTIONS = ['is_InitCamera', 'is_ExitCamera', 'is_GetNumberOfCameras', 'is_GetCameraList', 'is_GetCameraInfo',
+                 'is_GetSensorInfo', 'is_SetColorMode', 'is_AOI', 'is_AllocImageMem', 'is_FreeImageMem',
+                 'is_AddToSequence', 'is_ClearSequence', 'is_InitImageQueue', 'is_ExitImageQueue', 'is_InquireImageMem',
+                 'is_CaptureVideo', 'is_StopLiveVideo', 'is_FreezeVideo', 'is_WaitForNextImage', 'is_LockSeqBuf',
+                 'is_UnlockSeqBuf', 'is_GetImageInfo', 'is_EnableEvent', 'is_DisableEvent', 'is_WaitEvent',
+                 'is_Exposure', 'is_SetHardwareGain', 'is_GetFrameTimeRange', 'is_SetFrameRate', 'is_PixelClock']
+
+    def __init__(self, ueye, camera_number=1, **kwargs):
+        self.ueye    = ueye
+        self.sensors = {cam_id: FakeSensor(ueye, cam_id, **kwargs) for cam_id in range(1, camera_number+1)}
+
+    def sensor(self, hCam):
+        sensor = self.sensors.get(int(hCam.value))
+        if sensor is None or not sensor.is_open:
+            return None
+        return sensor
+
+    # --- device --- #
+    def is_InitCamera(self, phCam, hWnd):
+        '''
+        Open the device given by its id with IS_USE_DEVICE_ID, else the first
+        free one with the camera id (any if 0). The handle is the device id.
+        '''
+        hids = int(phCam.value)
+        if hids & self.ueye.IS_USE_DEVICE_ID:
+            cam_id = hids & ~self.ueye.IS_USE_DEVICE_ID
+        else:
+            free   = [key for key in sorted(self.sensors) if not self.sensors[key].is_open and hids in (0, self.sensors[key].camera_id)]
+            cam_id = free[0] if len(free) != 0 else -1
+        sensor = self.sensors.get(cam_id)
+        if sensor is None or sensor.is_open:
+            return self.ueye.IS_CANT_OPEN_DEVICE
+        time.sleep(sensor.open_delay)
+        sensor.is_open = True
+        phCam.value    = cam_id
+        return self.ueye.IS_SUCCESS
+
+    def is_ExitCamera(self, hCam):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        sensor.stopVideo()
+        sensor.is_open = False
+        sensor.memory, sensor.sequence = {}, []
+        sensor.queue.clear()
+        sensor.locked.clear()
+        return self.ueye.IS_SUCCESS
+
+    def is_GetNumberOfCameras(self, pnNumCams):
+        pnNumCams.value = len(self.sensors)
+        return self.ueye.IS_SUCCESS
+
+    def is_GetCameraList(self, pucl):
+        count = min(pucl.dwCount.value, len(self.sensors))
+        for info, cam_id in zip(pucl.uci[:count], sorted(self.sensors)):
+            sensor          = self.sensors[cam_id]
+            info.dwCameraID = self.ueye.c_uint(sensor.camera_id)
+            info.dwDeviceID = self.ueye.c_uint(cam_id)
+            info.dwInUse    = self.ueye.c_uint(int(sensor.is_open))
+            info.SerNo      = sensor.serial.encode()
+            info.Model      = sensor.model.encode()
+        return self.ueye.IS_SUCCESS
+
+    def is_GetCameraInfo(self, hCam, pInfo):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        pInfo.SerNo = sensor.serial.encode()
+        pInfo.ID    = b'Fake uEye'
+        return self.ueye.IS_SUCCESS
+
+    def is_GetSensorInfo(self, hCam, pInfo):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        pInfo.nMaxWidth   = self.ueye.c_uint(sensor.width)
+        pInfo.nMaxHeight  = self.ueye.c_uint(sensor.height)
+        pInfo.strSensorName = sensor.model.encode()
+        return self.ueye.IS_SUCCESS
+
+    # --- format --- #
+    def is_SetColorMode(self, hCam, Mode):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        if int(Mode) == self.ueye.IS_GET_COLOR_MODE:
+            return sensor.color_mode
+        sensor.color_mode = int(Mode)
+        return self.ueye.IS_SUCCESS
+
+    def is_AOI(self, hCam, nCommand, pParam, SizeOfParam):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        ueye = self.ueye
+        if   nCommand == ueye.IS_AOI_IMAGE_GET_AOI:
+            pParam.s32X, pParam.s32Y, pParam.s32Width, pParam.s32Height = [ueye.int(val) for val in sensor.aoi]
+        elif nCommand == ueye.IS_AOI_IMAGE_SET_AOI:
+            aoi = [pParam.s32X.value, pParam.s32Y.value, pParam.s32Width.value, pParam.s32Height.value]
+            if aoi[0] < 0 or aoi[1] < 0 or aoi[0]+aoi[2] > sensor.width or aoi[1]+aoi[3] > sensor.height or aoi[2] % 8 or aoi[3] % 2:
+                return ueye.IS_INVALID_PARAMETER
+            sensor.aoi = aoi
+            sensor.clampSettings()
+        elif nCommand == ueye.IS_AOI_IMAGE_GET_POS_INC:
+            pParam.s32X, pParam.s32Y = ueye.int(4), ueye.int(2)
+        elif nCommand == ueye.IS_AOI_IMAGE_GET_SIZE_INC:
+            pParam.s32Width, pParam.s32Height = ueye.int(8), ueye.int(2)
+        elif nCommand == ueye.IS_AOI_IMAGE_GET_SIZE_MIN:
+            pParam.s32Width, pParam.s32Height = ueye.int(16), ueye.int(4)
+        else:
+            return ueye.IS_NOT_SUPPORTED
+        return ueye.IS_SUCCESS
+
+    # --- memory --- #
+    def is_AllocImageMem(self, hCam, width, height, bitspixel, ppcImgMem, pid):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        width, height, bpp = int(width), int(height), int(bitspixel)
+        pitch  = -(-width*bpp//8 // 4) * 4 # lines aligned on 4 bytes
+        buff   = ctypes.create_string_buffer(pitch*height)
+        mem_id = sensor.next_id
+        sensor.next_id += 1
+        sensor.memory[mem_id] = (buff, width, height, bpp, pitch)
+        ppcImgMem.value = ctypes.addressof(buff)
+        pid.value       = mem_id
+        return self.ueye.IS_SUCCESS
+
+    def is_FreeImageMem(self, hCam, pcMem, id):
+        sensor = self.sensor(hCam)
+        if sensor is None or int(id.value) not in sensor.memory:
+            return self.ueye.IS_INVALID_PARAMETER
+        del sensor.memory[int(id.value)]
+        return self.ueye.IS_SUCCESS
+
+    def is_AddToSequence(self, hCam, pcMem, nID):
+        sensor = self.sensor(hCam)
+        if sensor is None or int(nID.value) not in sensor.memory:
+            return self.ueye.IS_INVALID_PARAMETER
+        sensor.sequence.append(int(nID.value))
+        return self.ueye.IS_SUCCESS
+
+    def is_ClearSequence(self, hCam):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        if sensor.thread is not None:
+            return self.ueye.IS_CAPTURE_RUNNING
+        with sensor.condition:
+            sensor.sequence = []
+            sensor.queue.clear()
+            sensor.locked.clear()
+            sensor.next_index = 0
+        return self.ueye.IS_SUCCESS
+
+    def is_InitImageQueue(self, hCam, nMode):
+        return self.ueye.IS_SUCCESS if self.sensor(hCam) is not None else self.ueye.IS_INVALID_CAMERA_HANDLE
+
+    def is_ExitImageQueue(self, hCam):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        with sensor.condition:
+            sensor.queue.clear()
+        return self.ueye.IS_SUCCESS
+
+    def is_InquireImageMem(self, hCam, pcMem, nID, pnX, pnY, pnBits, pnPitch):
+        sensor = self.sensor(hCam)
+        if sensor is None or int(nID.value) not in sensor.memory:
+            return self.ueye.IS_INVALID_PARAMETER
+        _, width, height, bpp, pitch = sensor.memory[int(nID.value)]
+        pnX.value, pnY.value, pnBits.value, pnPitch.value = width, height, bpp, pitch
+        return self.ueye.IS_SUCCESS
+
+    # --- video --- #
+    def is_CaptureVideo(self, hCam, Wait):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        if len(sensor.sequence) == 0:
+            return self.ueye.IS_NO_ACTIVE_IMG_MEM
+        sensor.startVideo()
+        return self.ueye.IS_SUCCESS
+
+    def is_StopLiveVideo(self, hCam, Wait):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        sensor.stopVideo()
+        return self.ueye.IS_SUCCESS
+
+    def is_FreezeVideo(self, hCam, Wait):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        if len(sensor.sequence) == 0:
+            return self.ueye.IS_NO_ACTIVE_IMG_MEM
+        sensor.exposeFrame()
+        return self.ueye.IS_SUCCESS
+
+    def is_WaitForNextImage(self, hCam, timeout, ppcMem, imageID):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        with sensor.condition:
+            if not sensor.condition.wait_for(lambda: len(sensor.queue) != 0, int(timeout)*1e-3):
+                return self.ueye.IS_TIMED_OUT
+            mem_id = sensor.queue.popleft()
+            sensor.locked.add(mem_id)
+        ppcMem.value  = ctypes.addressof(sensor.memory[mem_id][0])
+        imageID.value = mem_id
+        return self.ueye.IS_SUCCESS
+
+    def is_LockSeqBuf(self, hCam, nNum, pcMem):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        with sensor.condition:
+            sensor.locked.add(int(nNum.value))
+        return self.ueye.IS_SUCCESS
+
+    def is_UnlockSeqBuf(self, hCam, nNum, pcMem):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        with sensor.condition:
+            sensor.locked.discard(int(nNum.value))
+        return self.ueye.IS_SUCCESS
+
+    def is_GetImageInfo(self, hCam, nImageBufferID, pImageInfo, nImageInfoSize):
+        sensor = self.sensor(hCam)
+        if sensor is None or int(nImageBufferID.value) not in sensor.image_info:
+            return self.ueye.IS_INVALID_PARAMETER
+        frame_number, timestamp = sensor.image_info[int(nImageBufferID.value)]
+        pImageInfo.u64FrameNumber     = self.ueye.c_longlong(frame_number)
+        pImageInfo.u64TimestampDevice = self.ueye.c_longlong(timestamp)
+        return self.ueye.IS_SUCCESS
+
+    # --- events --- #
+    def is_EnableEvent(self, hCam, which):
+        sensor = self.sensor(hCam)
+        if sensor is None or which != self.ueye.IS_SET_EVENT_FRAME:
+            return self.ueye.IS_NOT_SUPPORTED
+        sensor.frame_event.clear()
+        sensor.event_on = True
+        return self.ueye.IS_SUCCESS
+
+    def is_DisableEvent(self, hCam, which):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        sensor.event_on = False
+        return self.ueye.IS_SUCCESS
+
+    def is_WaitEvent(self, hCam, which, nTimeout):
+        sensor = self.sensor(hCam)
+        if sensor is None or not sensor.event_on:
+            return self.ueye.IS_NOT_SUPPORTED
+        if not sensor.frame_event.wait(int(nTimeout)*1e-3):
+            return self.ueye.IS_TIMED_OUT
+        sensor.frame_event.clear()
+        return self.ueye.IS_SUCCESS
+
+    # --- settings --- #
+    def is_Exposure(self, hCam, nCommand, pParam, cbSizeOfParam):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        if   nCommand == self.ueye.IS_EXPOSURE_CMD_GET_EXPOSURE:
+            pParam.value = sensor.exposure
+        elif nCommand == self.ueye.IS_EXPOSURE_CMD_SET_EXPOSURE:
+            sensor.exposure = pParam.value
+            sensor.clampSettings()
+            pParam.value = sensor.exposure
+        else:
+            return self.ueye.IS_NOT_SUPPORTED
+        return self.ueye.IS_SUCCESS
+
+    def is_SetHardwareGain(self, hCam, nMaster, nRed, nGreen, nBlue):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        if int(nMaster) == self.ueye.IS_GET_MASTER_GAIN:
+            return sensor.gain
+        sensor.gain = min(max(int(nMaster), 0), 100)
+        return self.ueye.IS_SUCCESS
+
+    def is_GetFrameTimeRange(self, hCam, min, max, intervall):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        min.value, max.value, intervall.value = sensor.getFrameTimeRange()
+        return self.ueye.IS_SUCCESS
+
+    def is_SetFrameRate(self, hCam, FPS, newFPS):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        fps = FPS.value if hasattr(FPS, 'value') else FPS
+        if fps != self.ueye.IS_GET_FRAMERATE and fps > 0:
+            sensor.frame_time = 1./fps
+            sensor.clampSettings()
+        newFPS.value = 1./sensor.frame_time
+        return self.ueye.IS_SUCCESS
+
+    def is_PixelClock(self, hCam, nCommand, pParam, cbSizeOfParam):
+        sensor = self.sensor(hCam)
+        if sensor is None:
+            return self.ueye.IS_INVALID_CAMERA_HANDLE
+        ueye, clocks = self.ueye, sensor.pixelclocks
+        if   nCommand == ueye.IS_PIXELCLOCK_CMD_GET_NUMBER:
+            pParam.value = len(clocks)
+        elif nCommand == ueye.IS_PIXELCLOCK_CMD_GET_LIST:
+            for i in range(min(len(pParam), len(clocks))):
+                pParam[i] = clocks[i]
+        elif nCommand == ueye.IS_PIXELCLOCK_CMD_GET_RANGE:
+            pParam[0], pParam[1], pParam[2] = clocks[0], clocks[-1], 1
+        elif nCommand == ueye.IS_PIXELCLOCK_CMD_GET_DEFAULT:
+            pParam.value = clocks[len(clocks)//2]
+        elif nCommand == ueye.IS_PIXELCLOCK_CMD_GET:
+            pParam.value = sensor.pixelclock
+        elif nCommand == ueye.IS_PIXELCLOCK_CMD_SET:
+            if pParam.value not in clocks:
+                return ueye.IS_INVALID_PARAMETER
+            sensor.pixelclock = pParam.value
+            sensor.clampSettings()
+        else:
+            return ueye.IS_NOT_SUPPORTED
+        return ueye.IS_SUCCESS
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    driver = install_fake_ueye()
+    from s_Camera_class import Camera
+    camera = Camera(cam_id=0)
+    print('Camera initialized ? {}'.format(camera.isCameraInit))
+    camera.setPixelClock(86)
+    camera.setFrameRate(100)
+    # --- live video through the acquisition thread --- #
+    camera.start_acquisition()
+    time.sleep(2.)
+    camera.stop_acquisition()
+    print('Live: received {0}, dropped {1}'.format(camera.frame_counter.received, camera.frame_counter.dropped))
+    # --- burst --- #
+    movie = camera.acquire_movie(200)
+    # --- small AOI --- #
+    camera.set_roi(0, 0, 320, 240)
+    movie = camera.acquire_movie(1000)
+    camera.close_camera()
+    print('FINISHED')
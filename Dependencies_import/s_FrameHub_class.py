@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import threading
+import time
+
+from s_Workers_class                  import FrameQueue
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class FrameHub:
+    '''
+    Single reader of a camera shared by several widgets (see
+    CameraBackend.get_hub): it is the frame queue of the acquisition thread,
+    and hands the same Frame object to all the Subscriptions.
+        - subscribe() returns a Subscription, from which a widget takes its
+          frames at its own pace
+        - start()/stop() are counted: the acquisition runs as long as one
+          user (a running Subscription, the CameraManager...) started it
+    The data of a Camera frame is a view on a locked driver buffer (see
+    Camera.get_frame_record). Each subscription keeping a frame holds a
+    reference on it (Frame.retain), given back by Frame.release() when the
+    frame is dropped or consumed, and the buffer is unlocked with the last
+    one. The frames of the simulated cameras own their data.
+    '''
+    def __init__(self, camera):
+        self.camera        = camera
+        self.subscriptions = []
+        self.users         = 0
+        self.latest        = None
+        self.lock          = threading.Lock()
+
+    def subscribe(self, policy='latest', queue_size=4, decimation=1, rate=None):
+        '''
+        Return a new Subscription, stopped. See Subscription for the arguments.
+        '''
+        subscription = Subscription(self, policy=policy, queue_size=queue_size, decimation=decimation, rate=rate)
+        with self.lock:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+    def start(self):
+        with self.lock:
+            self.users += 1
+            isFirst = self.users == 1
+        if isFirst or self.camera.acquisition is None:
+            self.camera.start_acquisition()
+
+    def stop(self):
+        with self.lock:
+            self.users = max(self.users - 1, 0)
+            isLast = self.users == 0
+        if isLast:
+            self.camera.stop_acquisition()
+            frame = self.get_latest()
+            if frame is not None:
+                frame.release()
+
+    # --- frame queue of the acquisition thread --- #
+    def put(self, frame):
+        '''
+        Called from the acquisition thread with each Frame.
+        '''
+        with self.lock:
+            subscriptions = [subscription for subscription in self.subscriptions if subscription.isRunning]
+        for subscription in subscriptions:
+            subscription.offer(frame) # retained before get_latest() can release it
+        with self.lock:
+            previous    = self.latest
+            self.latest = frame
+        if previous is not None:
+            previous.release() # the reference of the producer is kept with latest
+        return None
+
+    def get_latest(self):
+        '''
+        Return the newest frame not taken yet, None if there is none. The
+        caller holds its reference.
+        '''
+        with self.lock:
+            frame, self.latest = self.latest, None
+        return frame
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class Subscription:
+    '''
+    Frames of a FrameHub kept for one reader, according to its policy:
+        - 'every'    : all the frames, queue_size at most waiting (the
+                       oldest being dropped beyond)
+        - 'latest'   : only the newest frame waits, the previous one is dropped
+        - 'decimated': one frame out of decimation, or at most rate frames
+                       per s (of frame time) if rate is given
+    get()/get_all()/get_latest() return Frames the reader owns: it calls
+    release() on each when done with it.
+    '''
+    POLICIES = ('every', 'latest', 'decimated')
+
+    def __init__(self, hub, policy='latest', queue_size=4, decimation=1, rate=None):
+        if policy not in self.POLICIES:
+            raise ValueError('Unknown policy {0}, not in {1}'.format(policy, self.POLICIES))
+        self.hub        = hub
+        self.policy     = policy
+        self.decimation = max(int(decimation), 1)
+        self.rate       = rate # Hz
+        self.queue      = FrameQueue(maxsize=1 if policy == 'latest' else queue_size)
+        self.isRunning  = False
+        self.offered    = 0
+        self.last_time  = None
+        self.received   = 0
+        self.dropped    = 0 # accepted but dropped before being read
+
+    def accepts(self, frame):
+        self.offered += 1
+        if self.policy != 'decimated':
+            return True
+        if self.rate is None:
+            return (self.offered - 1) % self.decimation == 0
+        if self.last_time is not None and frame.time - self.last_time < 1./self.rate:
+            return False
+        self.last_time = frame.time
+        return True
+
+    def offer(self, frame):
+        '''
+        Called from the acquisition thread by the hub.
+        '''
+        if not self.accepts(frame):
+            return None
+        frame.retain()
+        self.received += 1
+        dropped = self.queue.put(frame)
+        if dropped is not None:
+            self.dropped += 1
+            dropped.release()
+
+    def get(self, timeout=None):
+        '''
+        Return the oldest frame waiting, after at most timeout s (None if
+        none came), see AnalysisThread.
+        '''
+        return self.queue.get(timeout)
+
+    def get_all(self):
+        '''
+        Return the frames waiting, oldest first.
+        '''
+        return self.queue.get_all()
+
+    def get_latest(self):
+        '''
+        Return the newest frame waiting and release the older ones, None if
+        there is none.
+        '''
+        frames = self.queue.get_all()
+        if len(frames) == 0:
+            return None
+        for frame in frames[:-1]:
+            self.dropped += 1
+            frame.release()
+        return frames[-1]
+
+    def start(self):
+        if self.isRunning:
+            return None
+        self.isRunning = True
+        self.hub.start()
+
+    def stop(self):
+        if not self.isRunning:
+            return None
+        self.isRunning = False
+        self.hub.stop()
+        for frame in self.queue.get_all():
+            frame.release()
+
+    def close(self):
+        self.stop()
+        self.hub.unsubscribe(self)
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    from s_SyntheticCamera_class import SyntheticCamera
+    camera    = SyntheticCamera(fps=200., width=640, height=480)
+    hub       = camera.get_hub()
+    every     = hub.subscribe('every', queue_size=1000)
+    latest    = hub.subscribe('latest')
+    decimated = hub.subscribe('decimated', rate=20.)
+    for subscription in (every, latest, decimated):
+        subscription.start()
+    time.sleep(1.)
+    for subscription in (every, latest, decimated):
+        subscription.close()
+    for name, subscription in [('every', every), ('latest', latest), ('decimated', decimated)]:
+        print('{0:9}: {1} frames received, {2} dropped'.format(name, subscription.received, subscription.dropped))
+    camera.close_camera()
+    print('FINISHED')
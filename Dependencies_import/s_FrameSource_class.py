@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import os
+import re
+import threading
+
+import numpy as np
+import cv2
+from PIL import Image
+
+
+from s_Workers_class                  import timestamps_path
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+IMAGE_EXTENSIONS = ('.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp')
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv')
+
+def open_source(path):
+    '''
+    Return the FrameSource reading path: a directory of images, a
+    (multi-page) TIFF, a movie saved by acquire_movie (.npy) or a video.
+    '''
+    extension = os.path.splitext(path.rstrip('/'))[1].lower()
+    if os.path.isdir(path):
+        return ImageDirectorySource(path)
+    elif extension in ('.tif', '.tiff'):
+        return TiffSource(path)
+    elif extension == '.npy':
+        return NpySource(path)
+    elif extension in VIDEO_EXTENSIONS:
+        return VideoSource(path)
+    elif extension in IMAGE_EXTENSIONS:
+        return ImageDirectorySource(os.path.dirname(path) or '.', files=[os.path.basename(path)])
+    raise ValueError('Unknown frame source: {}'.format(path))
+
+def convert_image(image, color_mode='Grey', color=False, log=print):
+    '''
+    Convert a gray or BGR image to color_mode ('Grey'/1, 'HSV'/2, or 0 to
+    keep the BGR image), or to BGR if color is True.
+    '''
+    if image.ndim == 2 and (color or color_mode == 0 or color_mode == 'HSV' or color_mode == 2):
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if color_mode == 0 or color or image.ndim == 2:
+        return image
+    if   color_mode=='Grey' or color_mode==1:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    elif color_mode=='HSV'  or color_mode==2:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    log('mode argument not recognised.')
+    return image
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FrameSource:
+    '''
+    Indexed sequence of recorded frames, decoded on demand by read(index)
+    as a gray (H, W) or BGR (H, W, 3) array. Opening a source only indexes
+    it, and read() may be called from several threads.
+    timestamps() gives the recorded time of each frame in s, None if the
+    recording has none.
+    '''
+    files = [] # names of the files read, for the index of a packed stack
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def read(self, index):
+        raise NotImplementedError
+
+    def timestamps(self):
+        return None
+
+    def load_timestamps(self, path):
+        '''
+        Read a timestamps sidecar, None if missing or not matching.
+        '''
+        if path is None or not os.path.isfile(path):
+            return None
+        times = np.load(path)
+        return times if len(times) == len(self) else None
+
+    def close(self):
+        return None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class ImageDirectorySource(FrameSource):
+    '''
+    One image per file, in the alphabetical order of the names. The files
+    that are not images (by extension) are ignored.
+    '''
+    def __init__(self, path, files=None):
+        self.path  = path
+        if files is None:
+            files  = [name for name in sorted(os.listdir(path)) if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+        self.files = files
+
+    def __len__(self):
+        return len(self.files)
+
+    def timestamps(self):
+        '''
+        From the name_timestamps.npy saved by Preview with the images
+        name_000.tif, name_001.tif... The name is the one of the images, so
+        that the sidecar of another recording (the name_movie_timestamps.npy
+        of the movie itself for instance) is never taken.
+        '''
+        names = {re.sub(r'_\d+$', '', os.path.splitext(name)[0]) for name in self.files}
+        if len(names) != 1:
+            return None
+        return self.load_timestamps(os.path.join(self.path, names.pop() + '_timestamps.npy'))
+
+    def read(self, index):
+        image = cv2.imread(os.path.join(self.path, self.files[index]), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise IOError('Cannot read the image {}'.format(self.files[index]))
+        if image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        return image
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class TiffSource(FrameSource):
+    '''
+    Pages of a multi-page TIFF, read with PIL: the file stays open and only
+    the requested page is decoded, after a seek to it.
+    '''
+    def __init__(self, path):
+        self.path  = path
+        self.files = [os.path.basename(path)]
+        self.image = Image.open(path)
+        self.count = getattr(self.image, 'n_frames', 1)
+        self.lock  = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def read(self, index):
+        with self.lock:
+            self.image.seek(index)
+            image = np.array(self.image)
+        if image.ndim == 3:
+            image = cv2.cvtColor(image[:, :, :3], cv2.COLOR_RGB2BGR)
+        return image
+
+    def close(self):
+        self.image.close()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class NpySource(FrameSource):
+    '''
+    Movie saved by acquire_movie, a (num_frames, H, W) .npy file, memory
+    mapped: a frame is a read-only view, loaded by the page cache when used.
+    '''
+    def __init__(self, path):
+        self.path  = path
+        self.files = [os.path.basename(path)]
+        self.stack = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.stack)
+
+    def read(self, index):
+        return self.stack[index]
+
+    def timestamps(self):
+        return self.load_timestamps(timestamps_path(self.path))
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class VideoSource(FrameSource):
+    '''
+    Frames of a video file, read with cv2.VideoCapture. Reading in order
+    does not seek; any other index seeks to it first.
+    '''
+    def __init__(self, path):
+        self.path    = path
+        self.files   = [os.path.basename(path)]
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError('Cannot open the video {}'.format(path))
+        self.count   = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps     = self.capture.get(cv2.CAP_PROP_FPS)
+        self.next    = 0
+        self.lock    = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def timestamps(self):
+        if not self.fps > 0:
+            return None
+        return np.arange(self.count) / self.fps
+
+    def read(self, index):
+        with self.lock:
+            if index != self.next:
+                self.capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+            isRead, image = self.capture.read()
+            self.next = index + 1
+        if not isRead:
+            raise IOError('Cannot read the frame {0} of {1}'.format(index, self.path))
+        return image
+
+    def close(self):
+        self.capture.release()
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    print('FINISHED')
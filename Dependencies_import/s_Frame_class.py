@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import time
+import threading
+
+import numpy as np
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class Frame:
+    '''
+    One acquired image and the conditions of its acquisition.
+        - data        : numpy array of the image
+        - frame_number: frame counter of the device
+        - timestamp   : device timestamp in s, None when the device has none.
+                        For a replayed recording, the recorded or virtual time
+        - host_time   : time.perf_counter() when the frame reached the host, in s
+        - synced_time : acquisition time in the host time.perf_counter()
+                        timebase, set by a CameraManager (see HostClock)
+        - exposure    : exposure time in ms
+        - gain        : master hardware gain
+        - pixelclock  : pixel clock in MHz
+        - buffer      : the locked SequenceBuffer when data is a view on it
+        - source      : id of the camera that took the frame
+        - generation  : settings_generation of the camera at the capture, it
+                        changes each time a setting is applied
+    The FrameStats of data are computed by the first call to stats(), and
+    shared by all the widgets reading them.
+    A frame is reference counted: each holder calls release() when done,
+    the buffer (if any) being given back to the driver by the last one.
+    Holders keeping the image longer take a copy().
+    '''
+    __slots__ = ('data', 'frame_number', 'timestamp', 'host_time', 'synced_time', 'exposure', 'gain', 'pixelclock', 'buffer', 'source', 'generation', '_stats', '_refs')
+    ref_lock  = threading.Lock() # for the reference counts of all the frames
+
+    def __init__(self, data, frame_number=0, timestamp=None, host_time=None, exposure=None, gain=None, pixelclock=None, buffer=None, source=None, generation=0):
+        self.data         = data
+        self.frame_number = frame_number
+        self.timestamp    = timestamp
+        self.host_time    = time.perf_counter() if host_time is None else host_time
+        self.synced_time  = None
+        self.exposure     = exposure
+        self.gain         = gain
+        self.pixelclock   = pixelclock
+        self.buffer       = buffer
+        self.source       = source
+        self.generation   = generation
+        self._stats       = None
+        self._refs        = 1 # the one of the producer
+
+    def __repr__(self):
+        return 'Frame(#{0}, shape={1}, t={2:.6f}s)'.format(self.frame_number, self.data.shape, self.time)
+
+    @property
+    def time(self):
+        '''
+        Best known acquisition time in s: the device one if any, else the host one.
+        '''
+        if self.timestamp is not None:
+            return self.timestamp
+        return self.host_time
+
+    def stats(self):
+        '''
+        FrameStats of data, computed once.
+        '''
+        if self._stats is None:
+            self._stats = FrameStats(self.data)
+        return self._stats
+
+    def copy(self):
+        '''
+        Return a Frame owning a copy of data, for a holder keeping the image
+        after the buffer is given back.
+        '''
+        return Frame(np.array(self.data), frame_number=self.frame_number, timestamp=self.timestamp, host_time=self.host_time,
+                     exposure=self.exposure, gain=self.gain, pixelclock=self.pixelclock, source=self.source, generation=self.generation)
+
+    def retain(self, count=1):
+        '''
+        Add count holders of the frame, each one to call release().
+        '''
+        with Frame.ref_lock:
+            self._refs += count
+
+    def release(self):
+        with Frame.ref_lock:
+            self._refs -= 1
+            isLast = self._refs == 0
+        if isLast and self.buffer is not None:
+            self.buffer.release()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FrameStats:
+    '''
+    Statistics of an image: min, max, mean and the sum of each column, from
+    three reductions along the rows (column sums, maxima and minima, which
+    numpy vectorises), the rest being derived from these small arrays.
+    The number of saturated pixels is only counted when the max reaches the
+    saturation value, so unsaturated frames cost no extra pass, and the
+    histogram only on demand.
+    '''
+    __slots__ = ('data', 'rows', 'column_sums', 'min', 'max', 'mean', '_saturated', '_histogram')
+
+    def __init__(self, data):
+        self.data        = data
+        self.rows        = data.shape[0]
+        accumulator      = np.uint32 if data.dtype.kind in 'ui' and data.dtype.itemsize <= 2 else np.float64
+        self.column_sums = np.add.reduce(data, axis=0, dtype=accumulator)
+        self.max         = np.maximum.reduce(data, axis=0).max()
+        self.min         = np.minimum.reduce(data, axis=0).min()
+        self.mean        = self.column_sums.sum(dtype=np.float64) / data.size
+        self._saturated  = {}
+        self._histogram  = None
+
+    @property
+    def column_means(self):
+        return self.column_sums / self.rows
+
+    def saturated(self, max_value):
+        '''
+        Number of pixels at max_value or above.
+        '''
+        if self.max < max_value:
+            return 0
+        if max_value not in self._saturated:
+            self._saturated[max_value] = np.count_nonzero(self.data >= max_value)
+        return self._saturated[max_value]
+
+    def histogram(self):
+        '''
+        (values, counts) of the pixels, from min to max, computed once: one
+        bin per value for the unsigned images, 256 bins otherwise.
+        '''
+        if self._histogram is None:
+            if self.data.dtype.kind == 'u' and self.data.dtype.itemsize <= 2:
+                counts = np.bincount(self.data.ravel(), minlength=int(self.max)+1)[int(self.min):]
+                values = np.arange(int(self.min), int(self.max)+1)
+            else:
+                counts, edges = np.histogram(self.data, bins=256)
+                values = edges[:-1]
+            self._histogram = (values, counts)
+        return self._histogram
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FrameCounter:
+    '''
+    Count the received frames and detect the dropped ones from the gaps in
+    the sequence of frame numbers.
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.received          = 0
+        self.dropped           = 0
+        self.last_frame_number = None
+
+    def update(self, frame_number):
+        '''
+        Register a new frame number and return how many frames were dropped
+        just before it.
+        '''
+        gap = 0
+        if self.last_frame_number is not None and frame_number > self.last_frame_number:
+            gap = frame_number - self.last_frame_number - 1
+        self.received         += 1
+        self.dropped          += gap
+        self.last_frame_number = frame_number
+        return gap
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class HostClock:
+    '''
+    Map the timestamps of one device clock on the host time.perf_counter()
+    timebase, so that frames of several cameras can be compared.
+    The offset is the smallest host_time - timestamp seen so far, i.e. the
+    one of the frame that reached the host with the least latency.
+    '''
+    def __init__(self):
+        self.offset = None
+
+    def to_host(self, frame):
+        '''
+        Return the acquisition time of frame in the host timebase.
+        '''
+        if frame.timestamp is None:
+            return frame.host_time
+        offset = frame.host_time - frame.timestamp
+        if self.offset is None or offset < self.offset:
+            self.offset = offset
+        return frame.timestamp + self.offset
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    counter = FrameCounter()
+    for n in [1, 2, 3, 6, 7, 10]:
+        counter.update(n)
+    print('received: {0}, dropped: {1}'.format(counter.received, counter.dropped))
+    print('FINISHED')
@@ -56,12 +56,89 @@ def get_bits_per_pixel(color_mode):
             ueye.IS_CM_CBYCRY_PACKED: 16,
     } [color_mode]
 
+def get_bit_depth(color_mode):
+    """
+    returns the number of significant bits of one pixel channel for the given color mode
+    raises exception if color mode is not is not in dict
+    """
+    return {
+            ueye.IS_CM_SENSOR_RAW8: 8,
+            ueye.IS_CM_SENSOR_RAW10: 10,
+            ueye.IS_CM_SENSOR_RAW12: 12,
+            ueye.IS_CM_SENSOR_RAW16: 16,
+            ueye.IS_CM_MONO8: 8,
+            ueye.IS_CM_RGB8_PACKED: 8,
+            ueye.IS_CM_BGR8_PACKED: 8,
+            ueye.IS_CM_RGBA8_PACKED: 8,
+            ueye.IS_CM_BGRA8_PACKED: 8,
+            ueye.IS_CM_BGRA12_UNPACKED: 12,
+            ueye.IS_CM_BGR12_UNPACKED: 12,
+    } [color_mode]
+
+def get_pixel_dtype(color_mode):
+    """
+    returns the numpy type in which one pixel channel is stored for the given color mode
+    """
+    if get_bit_depth(color_mode) > 8:
+        return np.uint16
+    return np.uint8
+
+def get_camera_list():
+    '''
+    Return the connected uEye cameras as a list of dict with the keys
+    'device_id', 'cam_id', 'serial', 'model' and 'in_use'. device_id is
+    unique and the one to give to Camera(device_id=...): cam_id is set by the
+    user and is 1 for all the cameras as shipped.
+    '''
+    cam_nbr   = ueye.INT()
+    hasWorked = ueye.is_GetNumberOfCameras(cam_nbr)
+    if hasWorked != ueye.IS_SUCCESS or cam_nbr.value == 0:
+        return []
+    cam_list  = ueye.UEYE_CAMERA_LIST(uci=(ueye.UEYE_CAMERA_INFO * cam_nbr.value))
+    cam_list.dwCount = ueye.c_uint(cam_nbr.value)
+    hasWorked = ueye.is_GetCameraList(cam_list)
+    if hasWorked != ueye.IS_SUCCESS:
+        return []
+    devices = []
+    for info in cam_list.uci[:cam_list.dwCount.value]:
+        devices.append({'device_id': info.dwDeviceID.value,
+                        'cam_id': info.dwCameraID.value,
+                        'serial': info.SerNo.decode(errors='ignore'),
+                        'model' : info.Model.decode(errors='ignore'),
+                        'in_use': bool(info.dwInUse.value)})
+    return devices
+
 def rgb2gray(rgb):
     r, g, b = rgb[:,:,0], rgb[:,:,1], rgb[:,:,2]
     gray = 0.2989 * r + 0.5870 * g + 0.1140 * b
     gray = 0.2989 * r + 0.5870 * g + 0.1140 * b
     return gray
 
+def block_reduce(image, fy, fx, mode='max'):
+    '''
+    Reduce image by blocks of fy rows x fx columns, keeping the max of each
+    block (the peaks stay visible) or, with mode 'mean', their mean. The
+    edges not filling a block are dropped.
+    The blocks are combined row by row and column by column on strided views,
+    much faster than a reshape of the image to (h, fy, w, fx).
+    '''
+    if fy == 1 and fx == 1:
+        return image
+    h, w  = image.shape[0]//fy, image.shape[1]//fx
+    if mode == 'max':
+        ufunc, dtype = np.maximum, image.dtype
+    else:
+        ufunc, dtype = np.add, np.float32 if image.dtype.kind == 'f' else np.uint32
+    rows  = image[0:h*fy:fy, :w*fx].astype(dtype)
+    for i in range(1, fy):
+        ufunc(rows, image[i:h*fy:fy, :w*fx], out=rows)
+    block = rows[:, 0::fx].copy()
+    for j in range(1, fx):
+        ufunc(block, rows[:, j::fx], out=block)
+    if mode == 'max':
+        return block
+    return (block / (fy*fx)).astype(image.dtype)
+
 ####################################################################################################################
 # CODE
 ####################################################################################################################
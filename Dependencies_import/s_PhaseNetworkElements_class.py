@@ -8,6 +8,7 @@
 #########################################################################################################################
 import os
 import sys
+import threading
 import PyQt5
 from PyQt5.QtWidgets import QWidget, QFrame, QApplication
 from PyQt5.QtWidgets import QVBoxLayout,QHBoxLayout,QSplitter, QGridLayout
@@ -50,6 +51,14 @@ class PhaseNetworkElements(QWidget):
         self.dicspan   = {}
         self.postprocss_func = None
         self.procssfunc_default = True
+        self.time_origin = None # acquisition time of the first sampled frame
+        self.hist_ydata  = None # column profile of the last frame analysed
+        self.hist_time   = None # its acquisition time, see getFrameTime
+        self.plot_lock   = threading.RLock() # the analysis thread feeds the plots drawn by the GUI
+        self.hist_mode   = 0 # widget parameters read by the analysis thread, see snapshotParameters
+        self.sampling_time = 5 # s
+        self.span_regions  = {} # plot name: (PeakPlot, m, M)
+        self.plot_errors   = [] # of the analysis thread, reported by redrawPlots
         # --- main attriute --- #
         self.camera    = camera
         if not self.camera.isCameraInit:
@@ -78,6 +87,7 @@ class PhaseNetworkElements(QWidget):
         self.initLissajousPlot()
         # --- default --- #
         self.updatePtNbrLabel()
+        self.snapshotParameters()
         # --- layout --- #
         vsplitter      = QSplitter(PyQt5.QtCore.Qt.Vertical)
         vsplitter.addWidget( self.camera_view )
@@ -124,12 +134,17 @@ class PhaseNetworkElements(QWidget):
         self.postprocss    = QComboBox()
         self.postprocss.addItem('Max peak')
         self.postprocss.addItem('Sum area span')
+        self.setPostProcessFunction()
+        self.button_aoi    = QPushButton('AOI from spans')
+        self.button_aoi.setToolTip('Read only the columns covered by the spans (plus a margin), to raise the camera fps.')
         # --- connections --- #
         self.choosedirectory.clicked.connect(self.setNewSaveFile)
         self.button_save.clicked.connect( self.saveDataFromMultiplot )
         self.histrealtime.stateChanged.connect( self.setLinkToCameraTimer )
         self.histogram_data.currentIndexChanged.connect( self.setHistgrmPlotRange )
+        self.histogram_data.currentIndexChanged.connect( self.snapshotParameters )
         self.postprocss.currentIndexChanged.connect( self.setPostProcessFunction )
+        self.button_aoi.clicked.connect( self.setAOIFromSpans )
         # --- make layout --- #
         label_1 = QLabel('Histogram data: ')
         label_1.setWordWrap(True)
@@ -151,6 +166,7 @@ class PhaseNetworkElements(QWidget):
         grid.addWidget( self.button_save     , 4,0 , 1,2)
         grid.addWidget( self.choosedirectory , 5,0)
         grid.addWidget(self.savefile_name    , 5,1)
+        grid.addWidget( self.button_aoi      , 6,0 , 1,2)
         self.paramFrame.setLayout( grid )
 
     def initVertHistogram(self):
@@ -194,6 +210,7 @@ class PhaseNetworkElements(QWidget):
         # ---  --- #
         self.spanNumber.valueChanged.connect( self.updateMultiplots )
         self.samplingtime.valueChanged.connect( self.updatePtNbrLabel )
+        self.samplingtime.valueChanged.connect( self.snapshotParameters )
         self.camera_view.fps_input.valueChanged.connect( self.updatePtNbrLabel )
         # --- make layout --- #
         label_1 = QLabel('Sampling time (s): ')
@@ -371,12 +388,14 @@ class PhaseNetworkElements(QWidget):
                 self.removeSpan()
         self.makeLissajousAxisSelection()
         self.setSameYAxisMultiplots()
+        self.snapshotParameters()
 
     def addPlot(self, span):
         N = len( list(self.dicspan.keys()) )
         newplot = PeakPlot(name='plot_{}'.format(span.name), span=span, log=self.log)
         self.dicmultiplot[newplot.name] = [newplot]
         # ---  --- #
+        span.span.sigRegionChanged.connect( self.snapshotParameters )
         span.span.sigRegionChangeFinished.connect( self.updateMultiplots )
         # ---  --- #
         self.multi_plot.nextRow()
@@ -409,11 +428,52 @@ class PhaseNetworkElements(QWidget):
             plot = self.dicmultiplot[key][0]
             plot.setYLink(common_viewBox)
 
+    def setAOIFromSpans(self, margin=10):
+        '''
+        Shrink the camera AOI to the columns of the spans, and move the spans
+        so that they stay on the same columns of the sensor.
+        '''
+        if len(self.dicspan) == 0:
+            return None
+        regions = [self.dicspan[key].span.getRegion() for key in self.dicspan]
+        m, M    = np.min(regions), np.max(regions)
+        x0, y0, width, height = self.camera_view.camera.get_aoi()
+        new_aoi = self.camera_view.setAOI(x0 + m - margin, y0, M - m + 2*margin, height)
+        if new_aoi is None:
+            return None
+        shift   = x0 - new_aoi[0]
+        for key in self.dicspan:
+            region = self.dicspan[key].span.getRegion()
+            self.dicspan[key].span.setRegion([region[0]+shift, region[1]+shift])
+
+    def snapshotParameters(self):
+        '''
+        Copy the widget parameters used by the analysis thread (histogram
+        mode, sampling time, span regions), in the GUI thread whenever they
+        change.
+        '''
+        regions = {}
+        for key in self.dicmultiplot:
+            plot   = self.dicmultiplot[key][0]
+            region = plot.span.span.getRegion()
+            regions[key] = (plot, int(np.min(region)), int(np.max(region)))
+        with self.plot_lock:
+            self.hist_mode     = self.histogram_data.currentIndex()
+            self.sampling_time = self.samplingtime.value()
+            self.span_regions  = regions
+
     def setLinkToCameraTimer(self):
+        '''
+        The spans are sampled on every frame acquired, in the analysis thread
+        of the camera view, the plots are redrawn with the display only. The
+        analysis thread only reads the parameters of snapshotParameters.
+        '''
         if   self.histrealtime.checkState() == 0:
-            self.camera_view.timer.timeout.disconnect(self.updatePlotHistogram)
+            self.camera_view.frame_acquired.disconnect(self.updatePlotHistogram)
+            self.camera_view.frame_updated.disconnect(self.redrawPlots)
         elif self.histrealtime.checkState() == 2:
-            self.camera_view.timer.timeout.connect(self.updatePlotHistogram)
+            self.camera_view.frame_acquired.connect(self.updatePlotHistogram, Qt.DirectConnection)
+            self.camera_view.frame_updated.connect(self.redrawPlots)
 
     def addDataToFile(self):
         # --- stop timers to avoid over load --- #
@@ -440,7 +500,7 @@ class PhaseNetworkElements(QWidget):
             self.start_continuous_view()
 
     def acceptOrNot(self, i):
-        if type(self.data_hist.xData)==type(None):
+        if type(self.hist_ydata)==type(None):
             self.fittingactivate.setCheckState(0)
         return None
 
@@ -478,63 +538,107 @@ class PhaseNetworkElements(QWidget):
         B    = (Max_ - min_)*0.5
         return (xy_data-A)/B
 
-    def updatePlotHistogram(self):
-        frame = self.camera_view.frame
-        if type(frame) == type(None):
-            return None
+    def updatePlotHistogram(self, record):
+        '''
+        Sample the spans on record, called from the analysis thread.
+        '''
+        stats = record.stats()
         # --- mode data --- #
-        ind = self.histogram_data.currentIndex()
+        ind = self.hist_mode
         if   ind == 0: # raw
-            ydata = np.sum(frame,axis=0)/frame.shape[0]
+            ydata = stats.column_means
         elif ind == 1: # remove background
-            frame = frame-np.mean(frame)
-            ydata = np.sum(frame,axis=0)/frame.shape[0]
+            ydata = stats.column_means - stats.mean
             ydata = ydata + np.abs(np.min([0, np.min(ydata)]))
         elif ind == 2: # normalise
-            ydata = np.sum(frame,axis=0)/frame.shape[0]
+            ydata = stats.column_means
             ydata = ydata/np.max(ydata)
-        # --- plot data --- #
-        self.data_hist.setData( ydata, np.arange(len(ydata)) )
+        with self.plot_lock:
+            self.hist_ydata = ydata
+            self.hist_time  = self.getFrameTime(record)
+            try:
+                self.updateMultiplots(redraw=False)
+            except Exception as err:
+                self.plot_errors.append('Error: in updatePlotHistogram.\n{}'.format(err))
+
+    def redrawPlots(self):
+        '''
+        Show the last column profile and time series, at the display rate.
+        '''
+        self.reportPlotErrors()
+        with self.plot_lock:
+            if self.hist_ydata is None:
+                return None
+            self.data_hist.setData( self.hist_ydata, np.arange(len(self.hist_ydata)) )
+            for key in self.dicmultiplot:
+                self.dicmultiplot[key][0].redraw()
+            self.plot_max.redraw()
+            if self.button_plot_lissajs.isChecked():
+                self.updateLissajousPlot()
+
+    def updateMultiplots(self, redraw=True):
+        '''
+        Sample the spans on the last column profile. From the analysis thread
+        (redraw False) the errors are kept for redrawPlots.
+        '''
+        with self.plot_lock:
+            sum_max_peak = 0
+            data = self.hist_ydata
+            frame_time = self.hist_time
+            length_max = int(self.sampling_time*self.camera_view.analysis_fps())
+            for key in self.span_regions:
+                plot, m, M = self.span_regions[key]
+                plot.setLengthMax( length_max )
+                plot.setTimeWindow( self.sampling_time )
+                # ---  --- #
+                err_msg  = ''
+                cond_1 = type(data) != type(None) and m != M
+                cond_2 = cond_1 and (len(data) >= m or len(data) >= M)
+                cond_3 = cond_1 and len(data[m:M]) != 0
+                if cond_1 and cond_2 and cond_3:
+                    try:
+                        new_val = self.postprocss_func(data[m:M])# np.max(data[m:M])
+                        plot.addDataElement( new_val, frame_time, redraw=redraw )
+                    except:
+                        err_msg += 'Error: in updatePlot for object PeakPlot: '+plot.name
+                        err_msg += '\nIssue with: self.addDataElement( np.max(self.data[m:M]) ),'
+                        err_msg += '\nsample: {}'.format(data[m:M])
+                else:
+                    err_msg += '\nOne of the following condition is unsatisfied:\n \
+                    type(data) != type(None) and m != M: {0}\n \
+                    len(data) >= m or len(data) >= M: {1}\n \
+                    len(data[m:M]) != 0: {2}'.format(cond_1,cond_2,cond_3)
+                if err_msg != '':
+                    self.plot_errors.append( err_msg )
+                # ---  --- #
+                if plot.peakdata:
+                    sum_max_peak += plot.peakdata[-1]
+            self.plot_max.setLengthMax( length_max )
+            self.plot_max.setTimeWindow( self.sampling_time )
+            self.plot_max.addDataElement(sum_max_peak, frame_time, redraw=redraw)
         # ---  --- #
-        self.updateMultiplots()
+        if redraw:
+            self.reportPlotErrors()
+            if self.button_plot_lissajs.isChecked():# if self.doLissajous:
+                self.updateLissajousPlot()
 
-    def updateMultiplots(self):
-        if type(self.postprocss_func) == type(None):
-            self.setPostProcessFunction()
-        # ---  --- #
-        sum_max_peak = 0
-        data = self.data_hist.xData
-        for key in self.dicmultiplot:
-            plot = self.dicmultiplot[key][0]
-            plot.setLengthMax( int(self.samplingtime.value()*self.camera_view.fps) )
-            # ---  --- #
-            region = plot.span.span.getRegion()
-            m , M  = int(np.min(region)), int(np.max(region))
-            err_msg  = ''
-            cond_1 = type(data) != type(None) and m != M
-            cond_2 = len(data) >= m or len(data) >= M
-            cond_3 = len(data[m:M]) != 0
-            if cond_1 and cond_2 and cond_3:
-                try:
-                    new_val = self.postprocss_func(data[m:M])# np.max(data[m:M])
-                    plot.addDataElement( new_val )
-                except:
-                    err_msg += 'Error: in updatePlot for object PeakPlot: '+plot.name
-                    err_msg += '\nIssue with: self.addDataElement( np.max(self.data[m:M]) ),'
-                    err_msg += '\nsample: {}'.format(self.data[m:M])
-            else:
-                err_msg += '\nOne of the following condition is unsatisfied:\n \
-                type(data) != type(None) and m != M: {0}\n \
-                len(data) >= m or len(data) >= M: {1}\n \
-                len(data[m:M]) != 0: {2}'.format(cond_1,cond_2,cond_3)
-                self.log.addText( err_msg )
-            # ---  --- #
-            sum_max_peak += plot.peakdata[-1]
-        self.plot_max.setLengthMax( int(self.samplingtime.value()*self.camera_view.fps) )
-        self.plot_max.addDataElement(sum_max_peak)
-        # ---  --- #
-        if self.button_plot_lissajs.isChecked():# if self.doLissajous:
-            self.updateLissajousPlot()
+    def reportPlotErrors(self):
+        '''
+        Log the errors of updateMultiplots, each distinct message once.
+        '''
+        with self.plot_lock:
+            errors, self.plot_errors = self.plot_errors, []
+        for err_msg in dict.fromkeys(errors):
+            self.log.addText( err_msg )
+
+    def getFrameTime(self, record):
+        '''
+        Acquisition time (in s) of record, relative to the first sampled
+        frame, so that dropped frames show as gaps in the time series.
+        '''
+        if self.time_origin is None or record.time < self.time_origin:
+            self.time_origin = record.time
+        return record.time - self.time_origin
 
     def updateLissajousPlot(self):
         xaxis_ind = self.plot_xaxis.currentText()
@@ -559,7 +663,7 @@ class PhaseNetworkElements(QWidget):
             self.data_lissjs.setData( xdata, ydata )
 
     def updatePtNbrLabel(self):
-        self.samplingPtNbr.setText( str(self.samplingtime.value()*self.camera_view.fps) )
+        self.samplingPtNbr.setText( str(self.samplingtime.value()*self.camera_view.analysis_fps()) )
 
 #########################################################################################################################
 # CODE
@@ -58,14 +58,13 @@ class Preview(QWidget):
         elif not self.camera.isCameraInit:
             self.camera.__init__(cam_id=0, log=self.log)
         # ---  --- #
-        self.contview  = ContinuousView(fps=self.fps)
         self.timer     = pg.QtCore.QTimer() #QTimer()# pg.QtCore.QTimer()
         self.qlabl_max = QLabel()
         self.isOn      = False
         # ---  --- #
         self.initUI()
         # ---  --- #
-        self.camera.setExposure( self.image_widget.exposure.value() )
+        self.image_widget.settings.request('exposure', self.image_widget.exposure.value())
 
     def initUI(self):
         # ---  --- #
@@ -79,7 +78,7 @@ class Preview(QWidget):
         # ---  --- #
         self.movie_frameNbre  = QSpinBox()
         self.movie_frameNbre.setMinimum(0)
-        self.movie_frameNbre.setMaximum(1000)
+        self.movie_frameNbre.setMaximum(100000) # large movies go to a memmap, see Camera.acquire_movie
         self.movie_frameNbre.setValue(200)
         self.dir_save         = QFileDialog()
         self.dir_save_label   = QLabel('No file selected')
@@ -120,7 +119,7 @@ class Preview(QWidget):
         self.update_timer = QTimer()
 
     def initView(self):
-        self.image_widget = CameraDisplay(camera=self.camera, log=self.log)
+        self.image_widget = CameraDisplay(camera=self.camera, log=self.log, policy='latest') # display only
         self.image_view   = self.image_widget.image_view
         # --- histogram --- #
         self.hist_layWidget = pg.GraphicsLayoutWidget()
@@ -136,8 +135,7 @@ class Preview(QWidget):
         # --- link histogram to image view --- #
         self.image_widget.frame_updated.connect( self.updatePlotHistogram )
         # ---  --- #
-        self.image_view.setLevels(0,255)
-        self.image_view.getHistogramWidget().item.setHistogramRange(0,255) #not working when update
+        self.image_widget.setLevelsFromCamera()
         self.image_view.ui.roiBtn.hide()
         self.image_view.ui.menuBtn.hide()
         # ---  --- #
@@ -152,7 +150,6 @@ class Preview(QWidget):
 
     def setFPS(self):
         self.fps = self.fps_input.value()
-        self.contview.setFPS( self.fps )
         self.timer.setInterval(1e3/self.fps)
 
     def setHistogramMode(self, indx):
@@ -175,12 +172,13 @@ class Preview(QWidget):
             self.camera.capture_video()
 
     def updatePlotHistogram(self):
-        frame = self.image_widget.frame
-        if self.normalise_hist:
-            bckgrnd = np.mean(frame)
-            frame  = frame-bckgrnd
-        ydata  = np.sum(frame,axis=0)/frame.shape[0]
+        record = self.image_widget.frame_record
+        if record is None:
+            return None
+        stats  = record.stats()
+        ydata  = stats.column_means
         if self.normalise_hist:
+            ydata = ydata - stats.mean
             ydata -= np.min([0, np.min(ydata)])
             ydata = ydata/np.max(ydata)
         self.data_hist.setData(ydata)
@@ -195,7 +193,7 @@ class Preview(QWidget):
 
     def update_exposure(self):
         exp_val = self.exposure_spinb.value()
-        self.camera.setExposure( exp_val )
+        self.image_widget.settings.request('exposure', exp_val)
 
     def acquireFrame(self):
         wasOn = self.isOn
@@ -203,7 +201,7 @@ class Preview(QWidget):
             self.startStop_continuous_view()
         # ---  --- #
         try:
-            frame = self.camera.frame
+            frame = self.image_widget.frame
             plt.imshow(frame, cmap=self.cmap)
             plt.show()
         except:
@@ -225,7 +223,11 @@ class Preview(QWidget):
         self.progressbar.setValue(0)
         self.progressbar.setMaximum( self.movie_frameNbre.value() )
         # ---  --- #
-        movie = self.camera.acquire_movie( self.movie_frameNbre.value() )
+        movie = self.camera.acquire_movie( self.movie_frameNbre.value(), filename=dir_save_path+filename+'_movie.npy' )
+        if len(movie) == 0:
+            self.log.addText('Error: in acquireMovie. No frame acquired.')
+            return None
+        np.save(dir_save_path+filename+'_timestamps.npy', self.camera.movie_times) # for the replay, see SimuCamera
         try:
             img_to_save = Image.fromarray( movie[0] )
             img_to_save.save( dir_save_path+filename+'_{0:03d}.{1}'.format(0, format_) )
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import threading
+import time
+
+import numpy as np
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+
+class ReplayClock:
+    '''
+    Decide which recorded frame is due, from the recorded timestamps (s).
+    wait() blocks until the next frame is due and returns its count, the
+    number of frames since the start of the replay (the recording being
+    looped, the frame index is count % len(timestamps)).
+        - real time: the frames come at their recorded times divided by
+          speed; when the reader is late, the frames already past are
+          skipped, as a camera would drop them.
+        - virtual: no waiting at all, every frame is returned in order, as
+          fast as the reader goes. frame_time(count) still gives the
+          recorded time, for the analysis to see the original time axis.
+    The loop lasts the recording plus its median step, DEFAULT_STEP when
+    there is none (a single frame, equal timestamps). Empty or decreasing
+    timestamps raise a ValueError.
+    '''
+    DEFAULT_STEP = 0.1 # s
+
+    def __init__(self, timestamps, speed=1., virtual=False):
+        timestamps      = np.asarray(timestamps, dtype=float)
+        if len(timestamps) == 0 or np.any(np.diff(timestamps) < 0):
+            raise ValueError('The replay needs timestamps that never decrease.')
+        self.timestamps = timestamps - timestamps[0]
+        steps           = np.diff(self.timestamps)
+        step            = np.median(steps) if len(steps) != 0 else 0.
+        if step <= 0:
+            step = self.DEFAULT_STEP
+        self.period     = self.timestamps[-1] + step # s, duration of a loop, never 0
+        self.speed      = speed
+        self.virtual    = virtual
+        self.must_stop  = threading.Event()
+        self.reset()
+
+    def reset(self, first=0):
+        self.count = first - 1 # last frame returned
+        self.start = None
+
+    def frame_time(self, count):
+        '''
+        Recorded time of the frame count, in s, counting the loops.
+        '''
+        loop, index = divmod(count, len(self.timestamps))
+        return loop*self.period + self.timestamps[index]
+
+    def replay_time(self):
+        return (time.perf_counter() - self.start) * self.speed
+
+    def setSpeed(self, speed):
+        '''
+        Change the speed factor without jumping in the recording.
+        '''
+        if self.start is not None:
+            replay_time = self.replay_time()
+            self.start  = time.perf_counter() - replay_time/speed
+        self.speed = speed
+
+    def wait(self, timeout=1.):
+        '''
+        Return the count of the next frame to deliver once it is due, None
+        after timeout s or if stopped.
+        '''
+        if self.must_stop.is_set():
+            return None
+        if self.virtual:
+            self.count += 1
+            return self.count
+        if self.start is None: # the first frame is due now
+            self.start = time.perf_counter() - self.frame_time(self.count+1)/self.speed
+        delay = (self.frame_time(self.count+1) - self.replay_time()) / self.speed
+        if delay > timeout:
+            self.must_stop.wait(timeout)
+            return None
+        if delay > 0 and self.must_stop.wait(delay):
+            return None
+        # --- latest frame due, skipping the ones missed --- #
+        loop, elapsed = divmod(self.replay_time(), self.period)
+        index      = max(np.searchsorted(self.timestamps, elapsed, side='right') - 1, 0)
+        self.count = max(int(loop)*len(self.timestamps) + int(index), self.count+1)
+        return self.count
+
+    def stop(self):
+        self.must_stop.set()
+
+    def restart(self, first=0):
+        '''
+        Start again from the frame count first.
+        '''
+        self.must_stop.clear()
+        self.reset(first)
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    clock = ReplayClock(np.arange(100)*0.01, speed=2.)
+    start = time.perf_counter()
+    counts = [clock.wait() for i in range(50)]
+    print('50 frames of 10 ms at speed 2 in {:.3f} s'.format(time.perf_counter()-start))
+    print('FINISHED')
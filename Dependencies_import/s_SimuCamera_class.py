@@ -7,51 +7,189 @@
 # IMPORTATION
 ###################################################################################################################
 import matplotlib.pyplot as plt
+import numpy             as np
 import cv2
 
 
 import os
+import sys
+import json
+import time
+import threading
+
+
+from s_Workers_class                  import FramePacer, FrameCache, PrefetchThread, CACHE_MEMORY_BUDGET
+from s_CameraBackend_class            import CameraBackend
+from s_Frame_class                    import Frame, FrameCounter
+from s_FrameSource_class              import open_source, convert_image, ImageDirectorySource
+from s_ReplayClock_class              import ReplayClock
 
 
 ###################################################################################################################
 # FUNCTIONS
 ###################################################################################################################
+REPLAY_MODES = ('fps', 'recorded', 'virtual') # see SimuCamera.setReplayMode
+
+def stack_paths(path):
+    '''
+    Return the paths of the stack (.npy) and of its index (.json) packed
+    from path (a directory or a recording file), written next to it.
+    '''
+    base = path.rstrip('/')
+    if os.path.isfile(base):
+        base = os.path.splitext(base)[0]
+    return base + '_stack.npy', base + '_stack.json'
+
+def pack_directory(path, color_mode='Grey', log=print):
+    '''
+    Decode once all the frames of path (a directory of images or any
+    recording read by open_source) into a single .npy stack (num_frames,
+    H, W), with a .json index of the files, see stack_paths.
+    The stack is opened with np.load(mmap_mode='r') by SimuCamera: the
+    replay costs no decoding, and all the processes replaying it share the
+    page cache. Return the path of the stack.
+    '''
+    source = open_source(path)
+    if len(source) == 0:
+        raise ValueError('No image in {}'.format(path))
+    stack_path, index_path = stack_paths(path)
+    first = convert_image(source.read(0), color_mode, log=log)
+    stack = np.lib.format.open_memmap(stack_path, mode='w+', dtype=first.dtype, shape=(len(source),)+first.shape)
+    for i in range(len(source)):
+        image = first if i == 0 else convert_image(source.read(i), color_mode, log=log)
+        if image.shape != first.shape:
+            del stack
+            os.remove(stack_path)
+            raise ValueError('Frame {0} is {1}, the frames must all be {2}'.format(i, image.shape, first.shape))
+        stack[i] = image
+    stack.flush()
+    del stack
+    times = source.timestamps()
+    source.close()
+    with open(index_path, 'w') as index_file:
+        json.dump({'source': os.path.abspath(path), 'files': source.files, 'mtime': os.path.getmtime(path),
+                   'color_mode': color_mode, 'shape': list(first.shape), 'dtype': str(first.dtype),
+                   'timestamps': None if times is None else [float(t) for t in times]}, index_file, indent=1)
+    log('Packed {0} frames in {1}'.format(i+1, stack_path))
+    return stack_path
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 
-class SimuCamera:
-    def __init__(self, cam_num=-1, directory_path=None, log=None, color_mode='Grey'):
+class SimuCamera(CameraBackend):
+    '''
+    Replay of recorded frames, looped forever: the images of a directory,
+    a multi-page TIFF, a movie saved by acquire_movie or a video, see
+    open_source. The frames are decoded on demand and color converted once:
+    they are kept in an LRU cache of memory_budget bytes, and a background
+    thread decodes the next prefetch ones ahead of the reader.
+    When the recording was packed with pack_directory (or directory_path is
+    the packed .npy stack itself), the frames are read-only views of the
+    memmapped stack instead, without cache nor copy.
+    The frames come at self.fps, or at their recorded times, or as fast as
+    they are read, see setReplayMode.
+    '''
+    def __init__(self, cam_num=-1, directory_path=None, log=None, color_mode='Grey', fps=10., prefetch=8, memory_budget=CACHE_MEMORY_BUDGET, replay='fps', speed=1.):
         self.cam_num = cam_num
         self.cap     = None
+        self.fps     = fps
+        self.max_value = 255
+        self.frame_queue = None
+        self.acquisition = None
+        self.on_frame    = None # called with each acquired Frame, see CameraManager
+        self.settings_generation = 0
+        self.frame_counter = FrameCounter()
+        self.frame_event = threading.Event()
+        self.pacer       = None
         self.colorMode = color_mode
+        self.roi       = None # (x, y, width, height) cropped from the images, None for the full image
+        self.exposure  = 12.5 # ms, the intensities are scaled by exposure/reference_exposure
+        self.reference_exposure = 12.5 # ms, exposure of the recorded images
         self.viewpath = directory_path
         self.log     = log
+        self.prefetch   = prefetch # number of images decoded ahead
+        self.cache      = FrameCache(memory_budget)
+        self.prefetcher = None
+        self.stack      = None # memmap of the packed images
+        self.source     = None # FrameSource of the recording
+        self.stack_index= None # index of the packed stack
+        self.replay     = replay
+        self.speed      = speed
+        self.clock      = None # ReplayClock of the recorded and virtual modes
+        self.replay_count = None
         # ---  --- #
         self.initialize()
 
     def initialize(self):
+        self.stack = self.open_stack(self.viewpath)
+        if self.stack is not None:
+            self.viewnbr      = len(self.stack)
+            self.lastindx     = 0
+            self.frame        = None
+            self.isCameraInit = True
+            self.setReplayMode(self.replay, self.speed)
+            return None
         try:
-            self.viewlist = os.listdir(self.viewpath)
-            self.viewlist.sort()
-            self.viewnbr  = len(self.viewlist)
+            if self.source is not None:
+                self.source.close()
+            self.source   = open_source(self.viewpath)
+            self.viewlist = self.source.files
+            self.viewnbr  = len(self.source)
             self.isCameraInit = True
-        except:
+        except Exception:
             self.addToLog('Error: no valid path given.\nCurrent path is: {}'.format(self.viewpath))
             self.close_camera()
             self.isCameraInit = False
             return None
-        if self.viewpath[-1] != '/': self.viewpath+='/'
         # ---  --- #
         if self.viewnbr == 0:
-            self.addToLog('Error: directory empty.')
+            self.addToLog('Error: no image found.')
             self.close_camera()
         # ---  --- #
         self.lastindx   = 0
         self.frame = None
+        self.cache.clear()
+        if self.prefetcher is None:
+            self.prefetcher = PrefetchThread(self.decode, self.cache, log=self.addToLog)
+            self.prefetcher.start()
+        if self.viewnbr != 0:
+            self.setReplayMode(self.replay, self.speed)
 
-    def addToLog(self, txt):
-        if self.log != None:
-            self.log.addText(txt)
-        else:
-            print(txt)
+    def recording_timestamps(self):
+        '''
+        Recorded time of each frame in s, None if the recording has none.
+        '''
+        if self.stack is not None:
+            times = self.stack_index.get('timestamps')
+            return None if times is None else np.array(times)
+        return self.source.timestamps()
+
+    def setReplayMode(self, mode, speed=1.):
+        '''
+        Timing of the replay:
+            - 'fps'     : one frame every 1/self.fps s
+            - 'recorded': the recorded times, divided by speed (self.fps
+                          without timestamps). Late frames are skipped.
+            - 'virtual' : no waiting, every frame in order, as fast as the
+                          acquisition thread reads them, for benchmarks and
+                          batch analysis. The frames keep the recorded times.
+        Change it with the acquisition stopped, or through submit.
+        '''
+        if mode not in REPLAY_MODES:
+            raise ValueError('Unknown replay mode: {}'.format(mode))
+        self.replay, self.speed = mode, speed
+        self.clock = None
+        if mode == 'fps':
+            return None
+        times = self.recording_timestamps()
+        if times is None:
+            if mode == 'recorded':
+                self.addToLog('No timestamps in the recording, replay at {} fps.'.format(self.fps))
+            times = np.arange(max(self.viewnbr, 1)) / self.fps
+        try:
+            self.clock = ReplayClock(times, speed, virtual=(mode == 'virtual'))
+        except ValueError as err:
+            self.addToLog('Error: in setReplayMode. {0} Replay at {1} fps.'.format(err, self.fps))
+            self.clock = ReplayClock(np.arange(max(self.viewnbr, 1)) / self.fps, speed, virtual=(mode == 'virtual'))
 
     def __info__(self):
         self.addToLog('Current directory path      : {}'.format(self.viewpath))
@@ -61,26 +199,139 @@ class SimuCamera:
 
     def change_colormode(self, colormode):
         self.colorMode = colormode
+        if self.stack is not None:
+            self.initialize() # the stack is in a single color mode
+
+    def open_stack(self, path):
+        '''
+        Return the memmap of the stack packed from path (a recording or the
+        .npy stack), None if there is none or if it is out of date.
+        '''
+        if path is None:
+            return None
+        if path.endswith('.npy'):
+            stack_path, index_path = path, path[:-len('.npy')] + '.json'
+        else:
+            stack_path, index_path = stack_paths(path)
+        if not (os.path.isfile(stack_path) and os.path.isfile(index_path)):
+            return None
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        if index['color_mode'] != self.colorMode:
+            return None
+        if path.endswith('.npy'):
+            pass
+        elif os.path.isdir(path) and ImageDirectorySource(path).files != index['files']:
+            self.addToLog('{} changed since it was packed, the images are read instead.'.format(path))
+            return None
+        elif os.path.isfile(path) and os.path.getmtime(path) != index['mtime']:
+            self.addToLog('{} changed since it was packed, the frames are read instead.'.format(path))
+            return None
+        self.viewlist    = index['files']
+        self.stack_index = index
+        return np.load(stack_path, mmap_mode='r')
+
+    def decode(self, key):
+        '''
+        Read and color convert the image of key = (index, colorMode, color).
+        '''
+        index, colorMode, color = key
+        image = convert_image(self.source.read(index), colorMode, color, log=self.addToLog)
+        if image.base is not None:
+            image = np.array(image) # a view on a memmap or a reader buffer
+        image.flags.writeable = False # shared by the cache
+        return image
 
-    def get_frame(self):
-        self.frame = cv2.imread(self.viewpath+self.viewlist[self.lastindx])
-        self.lastindx   = (self.lastindx+1)%self.viewnbr
+    def get_image(self, index, color=False):
+        '''
+        Return the decoded image index from the cache, decoding it on a miss,
+        and let the prefetch thread decode the following ones.
+        '''
+        if self.stack is not None:
+            image = self.stack[index]
+            if color and image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            return image
+        key   = (index, self.colorMode, color)
+        image = self.cache.get(key)
+        if image is None:
+            image = self.decode(key)
+            self.cache.put(key, image)
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch( ((index+k)%self.viewnbr, self.colorMode, color) for k in range(1, self.prefetch+1) )
+        return image
+
+    def get_frame(self, color=False):
+        self.frame    = self.get_image(self.lastindx, color=color)
+        self.lastindx = (self.lastindx+1)%self.viewnbr
         # ---  --- #
-        if self.colorMode != 0:
-            if   self.colorMode=='Grey' or self.colorMode==1:
-                self.frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
-            elif self.colorMode=='HSV'  or self.colorMode==2:
-                self.frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
-            else:
-                self.addToLog('mode argument not recognised.')
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            self.frame = self.frame[y:y+h, x:x+w]
+        if self.exposure != self.reference_exposure:
+            self.frame = cv2.convertScaleAbs(self.frame, alpha=self.exposure/self.reference_exposure) # saturates at 255
+        elif self.stack is None:
+            self.frame = np.array(self.frame) # the cached image stays untouched
         # ---  --- #
         return self.frame
 
-    def acquire_movie(self, num_frames):
-        movie = []
-        for _ in range(num_frames):
-            movie.append(self.get_frame())
-        return movie
+    def get_frame_record(self, color=False):
+        '''
+        Return the next image as a Frame, numbered in reading order, or with
+        the replay clock, by its count in the replay and its recorded time.
+        '''
+        host_time = time.perf_counter()
+        data      = self.get_frame(color=color)
+        timestamp = None
+        if self.clock is not None and self.replay_count is not None:
+            frame_number = self.replay_count
+            timestamp    = self.clock.frame_time(frame_number)
+        else:
+            frame_number = self.frame_counter.received
+        self.frame_counter.update(frame_number)
+        return Frame(data, frame_number=frame_number, timestamp=timestamp, host_time=host_time, exposure=self.exposure, generation=self.settings_generation)
+
+    def enable_frame_event(self):
+        '''
+        Start the pacer emulating the camera frame event at self.fps, or the
+        replay clock from the current image.
+        '''
+        if self.clock is not None:
+            self.clock.restart(self.lastindx)
+            self.replay_count = None
+            return None
+        if self.pacer is not None:
+            return None
+        self.frame_event.clear()
+        self.pacer = FramePacer(self, self.frame_event)
+        self.pacer.start()
+
+    def disable_frame_event(self):
+        if self.clock is not None:
+            self.clock.stop()
+        if self.pacer is None:
+            return None
+        self.pacer.stop()
+        self.pacer = None
+
+    def waitForNextFrame(self, timeout=1000):
+        '''
+        Block on the emulated frame event (timeout in ms), as Camera does on
+        the uEye one, or until the replay clock gives the next frame.
+        '''
+        if self.clock is not None:
+            count = self.clock.wait(timeout*1e-3)
+            if count is None:
+                return False
+            self.replay_count = count
+            self.lastindx     = count % self.viewnbr
+            return True
+        if self.pacer is None:
+            self.enable_frame_event()
+        if not self.frame_event.wait(timeout*1e-3):
+            return False
+        self.frame_event.clear()
+        return True
 
     def capture_video(self):
         return None
@@ -89,15 +340,51 @@ class SimuCamera:
         return None
 
     def close_camera(self):
+        self.stop_acquisition()
+        self.disable_frame_event()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
         self.isCameraInit = False
         return None
 
     def setDirectoryPath(self, newdir_path):
         self.viewpath = newdir_path
+        self.cache.clear()
+
+    def pack(self):
+        '''
+        Pack the current directory (see pack_directory) and replay the stack.
+        '''
+        if self.stack is not None:
+            return None
+        pack_directory(self.viewpath, self.colorMode, log=self.addToLog)
+        self.initialize()
 
     def set_aoi(self, x,y,w,h):
         return None
 
+    def get_aoi(self):
+        if self.roi is not None:
+            return self.roi
+        h, w = self.get_image(self.lastindx).shape[:2]
+        return 0, 0, w, h
+
+    def set_roi(self, x, y, width, height, max_fps=True):
+        '''
+        Crop the images to the rectangle, as Camera.set_roi does with the AOI.
+        '''
+        x, y   = max(int(x), 0), max(int(y), 0)
+        self.roi = (x, y, int(np.ceil(width)), int(np.ceil(height)))
+        self.settings_generation += 1
+        self.addToLog('New AOI: {}'.format(self.roi))
+        return self.roi
+
+    def reset_roi(self, max_fps=True):
+        self.roi = None
+        self.settings_generation += 1
+        return self.get_aoi()
+
     def set_colormode(self):
         return None
 
@@ -105,10 +392,13 @@ class SimuCamera:
         return None
 
     def getExposure(self):
-        return 0
+        return self.exposure
 
     def setExposure(self, exp_val):
-        return None
+        '''
+        Exposure time in ms, emulated by scaling the image intensities.
+        '''
+        self.exposure = float(exp_val)
 
     def setHarwareGain(self, gain_val):
         return None
@@ -117,14 +407,18 @@ class SimuCamera:
         return 0, 0, 0
 
     def getFrameRate(self):
-        return 0
+        return self.fps
 
     def setFrameRate(self, fr):
+        self.fps = fr
         return fr
 
     def getPixelClock(self):
         return 0
 
+    def getPixelClockList(self):
+        return [0]
+
     def setPixelClock(self, pxl_clck):
         return None
 
@@ -137,4 +431,6 @@ if __name__ == '__main__':
     print('STARTING')
     #camera = SimuCamera(0)
     #print(camera.get_frame().shape)
+    if len(sys.argv) > 1: # python s_SimuCamera_class.py recording
+        pack_directory(sys.argv[1])
     print('FINISHED')
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+###################################################################################################################
+# IMPORTATION
+###################################################################################################################
+import numpy             as np
+import cv2
+
+
+import time
+import threading
+
+
+from s_Workers_class                  import FramePacer
+from s_CameraBackend_class            import CameraBackend
+from s_Frame_class                    import Frame, FrameCounter
+
+
+###################################################################################################################
+# FUNCTIONS
+###################################################################################################################
+
+class SyntheticCamera(CameraBackend):
+    '''
+    Camera generating its frames with numpy, for load tests far beyond the
+    speed of SimuCamera: spot_number gaussian spots on a noisy background,
+    whose intensities oscillate as interference fringes with a slowly
+    drifting phase. With saturation the brightest spots are clipped at
+    max_value.
+    Frame k only depends on seed and k (positions, fringe frequencies and
+    phases are drawn once, the noise comes from a bank of noise_frames
+    images), so two runs with the same seed give the same movie.
+    To reach hundreds of fps at full resolution, a frame is a copy of a noise
+    image plus each spot rendered (and clipped) in its own small window.
+    '''
+    def __init__(self, cam_num=-2, width=1280, height=1024, bit_depth=8, fps=200., spot_number=8, spot_sigma=6.,
+                 noise=2., saturation=False, seed=0, noise_frames=16, log=None):
+        self.cam_num   = cam_num
+        self.width     = width
+        self.height    = height
+        self.bit_depth = bit_depth
+        self.fps       = fps
+        self.spot_number = spot_number
+        self.spot_sigma  = spot_sigma # px
+        self.noise     = noise # standard deviation in counts
+        self.saturation= saturation
+        self.seed      = seed
+        self.noise_frames = noise_frames
+        self.log       = log
+        self.frame_queue = None
+        self.acquisition = None
+        self.on_frame    = None
+        self.settings_generation = 0
+        self.frame_counter = FrameCounter()
+        self.frame_event = threading.Event()
+        self.pacer       = None
+        self.roi         = None
+        self.exposure    = 10. # ms, the spot amplitudes are proportional to it
+        self.reference_exposure = 10.
+        self.gain        = 0
+        # ---  --- #
+        self.initialize()
+
+    def initialize(self):
+        '''
+        Draw the spots and the noise bank from the seed.
+        '''
+        self.dtype     = np.uint8 if self.bit_depth <= 8 else np.uint16
+        self.bpp       = 8 * np.dtype(self.dtype).itemsize
+        self.max_value = 2**self.bit_depth - 1
+        rng            = np.random.default_rng(self.seed)
+        # --- spots --- #
+        margin         = int(4*self.spot_sigma) + 1
+        self.spot_x    = rng.uniform(margin, self.width  - margin, self.spot_number)
+        self.spot_y    = rng.uniform(margin, self.height - margin, self.spot_number)
+        peak           = 1.5 if self.saturation else 0.8 # of max_value, for the brightest fringe
+        self.amplitude = rng.uniform(0.5, 1., self.spot_number) * peak * self.max_value
+        self.visibility= rng.uniform(0.6, 1., self.spot_number)
+        self.frequency = rng.uniform(0.5, 5., self.spot_number) # Hz
+        self.phase     = rng.uniform(0, 2*np.pi, self.spot_number)
+        self.drift     = rng.normal(0, 0.3, self.spot_number) # rad/s
+        # --- background --- #
+        background     = 0.05 * self.max_value
+        noise          = rng.normal(background, self.noise, (self.noise_frames, self.height, self.width))
+        self.noise_bank= np.clip(noise, 0, self.max_value).astype(self.dtype)
+        # ---  --- #
+        self.half_size = margin
+        self.frame_number = 0
+        self.frame     = None
+        self.isCameraInit = True
+
+    def __info__(self):
+        self.addToLog('Synthetic frames: {0}x{1}, {2} bits, {3} spots, seed {4}'.format(self.width, self.height, self.bit_depth, self.spot_number, self.seed))
+
+    # --- frames --- #
+    def spot_intensities(self, t):
+        '''
+        Peak intensity of each spot at time t (s).
+        '''
+        phase = 2*np.pi*self.frequency*t + self.phase + self.drift*t
+        scale = self.exposure / self.reference_exposure
+        return scale * self.amplitude * (1 + self.visibility*np.cos(phase)) / 2.
+
+    def render(self, k):
+        '''
+        Return frame k, cropped to the roi.
+        '''
+        x0, y0, w, h = self.get_aoi()
+        frame  = self.noise_bank[k % self.noise_frames, y0:y0+h, x0:x0+w].copy()
+        size   = self.half_size
+        for x, y, peak in zip(self.spot_x, self.spot_y, self.spot_intensities(k/self.fps)):
+            xi, yi = int(round(x)) - x0, int(round(y)) - y0
+            xa, xb = max(xi-size, 0), min(xi+size+1, w)
+            ya, yb = max(yi-size, 0), min(yi+size+1, h)
+            if xa >= xb or ya >= yb:
+                continue # spot out of the roi
+            gx = np.exp(-(np.arange(xa, xb) + x0 - x)**2 / (2*self.spot_sigma**2))
+            gy = np.exp(-(np.arange(ya, yb) + y0 - y)**2 / (2*self.spot_sigma**2))
+            spot = frame[ya:yb, xa:xb] + np.outer(peak*gy, gx)
+            frame[ya:yb, xa:xb] = np.minimum(spot, self.max_value) # only the windows can saturate
+        return frame
+
+    def get_frame(self, color=False):
+        self.frame = self.render(self.frame_number)
+        self.frame_number += 1
+        if color:
+            return cv2.cvtColor(self.frame, cv2.COLOR_GRAY2BGR)
+        return self.frame
+
+    def get_frame_record(self, color=False):
+        '''
+        Return the next frame as a Frame, stamped with its time in the
+        generated movie.
+        '''
+        host_time    = time.perf_counter()
+        frame_number = self.frame_number
+        data         = self.get_frame(color=color)
+        self.frame_counter.update(frame_number)
+        return Frame(data, frame_number=frame_number, timestamp=frame_number/self.fps, host_time=host_time,
+                     exposure=self.exposure, gain=self.gain, generation=self.settings_generation)
+
+    # --- video and events --- #
+    def enable_frame_event(self):
+        if self.pacer is not None:
+            return None
+        self.frame_event.clear()
+        self.pacer = FramePacer(self, self.frame_event)
+        self.pacer.start()
+
+    def disable_frame_event(self):
+        if self.pacer is None:
+            return None
+        self.pacer.stop()
+        self.pacer = None
+
+    def waitForNextFrame(self, timeout=1000):
+        if self.pacer is None:
+            self.enable_frame_event()
+        if not self.frame_event.wait(timeout*1e-3):
+            return False
+        self.frame_event.clear()
+        return True
+
+    def capture_video(self):
+        return None
+
+    def stop_video(self):
+        return None
+
+    def close_camera(self):
+        self.stop_acquisition()
+        self.disable_frame_event()
+        self.isCameraInit = False
+
+    # --- buffers and AOI --- #
+    def set_colormode(self):
+        return None
+
+    def alloc(self):
+        return None
+
+    def get_aoi(self):
+        if self.roi is not None:
+            return self.roi
+        return 0, 0, self.width, self.height
+
+    def set_aoi(self, x, y, width, height):
+        self.roi = (x, y, width, height)
+
+    def set_roi(self, x, y, width, height, max_fps=True):
+        x, y   = min(max(int(x), 0), self.width-1), min(max(int(y), 0), self.height-1)
+        width  = min(int(np.ceil(width)),  self.width  - x)
+        height = min(int(np.ceil(height)), self.height - y)
+        self.set_aoi(x, y, width, height)
+        self.settings_generation += 1
+        self.addToLog('New AOI: {}'.format(self.roi))
+        return self.roi
+
+    def reset_roi(self, max_fps=True):
+        self.roi = None
+        self.settings_generation += 1
+        return self.get_aoi()
+
+    # --- settings --- #
+    def getExposure(self):
+        return self.exposure
+
+    def setExposure(self, exp_val):
+        self.exposure = float(exp_val)
+
+    def setHarwareGain(self, gain_val):
+        self.gain = gain_val
+
+    def getFrameTimeRange(self):
+        return 0, 0, 0
+
+    def getFrameRate(self):
+        return self.fps
+
+    def setFrameRate(self, fr):
+        self.fps = fr
+        return fr
+
+    def getPixelClock(self):
+        return 0
+
+    def getPixelClockList(self):
+        return [0]
+
+    def setPixelClock(self, pxl_clck):
+        return None
+
+###################################################################################################################
+# CODE
+###################################################################################################################
+
+if __name__ == '__main__':
+    print('STARTING')
+    camera = SyntheticCamera(fps=1000.)
+    camera.__info__()
+    start = time.perf_counter()
+    for k in range(500):
+        camera.get_frame()
+    print('Generation: {:.0f} fps'.format(500/(time.perf_counter()-start)))
+    movie = camera.acquire_movie(500)
+    camera.close_camera()
+    print('FINISHED')
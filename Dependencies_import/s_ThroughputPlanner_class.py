@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+
+####################################################################################################################
+# IMPORTATION
+####################################################################################################################
+import numpy as np
+
+####################################################################################################################
+# FUNCTIONS
+####################################################################################################################
+USB_BANDWIDTH = {'USB 2': 40., 'USB 3': 350.} # usable payload in MB/s
+
+def estimate_bandwidth(width, height, bits_per_pixel, fps):
+    '''
+    Data rate of the video in MB/s.
+    '''
+    return width * height * bits_per_pixel / 8. * fps * 1e-6
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class ThroughputPlanner:
+    '''
+    Choose the camera settings for a target fps and exposure: the lowest
+    pixel clock whose minimal frame time allows the fps, since a high pixel
+    clock only adds USB load and transfer failures.
+    The frame time range depends on the pixel clock, the AOI and the bit
+    depth, so the clocks are probed on the camera itself (bisection on the
+    list of accepted clocks, the fastest frame rate increasing with them).
+    The probing changes the pixel clock, which clamps the frame rate and
+    the exposure: the three are restored after it. Run plan() with
+    camera.submit during a video, as apply() does.
+    '''
+    def __init__(self, camera, usb_bandwidth=USB_BANDWIDTH['USB 2']):
+        self.camera        = camera
+        self.usb_bandwidth = usb_bandwidth # MB/s
+
+    def maxFrameRate(self, pixelclock):
+        self.camera.setPixelClock(pixelclock)
+        ftmin, _, _ = self.camera.getFrameTimeRange()
+        return np.inf if ftmin == 0 else 1./ftmin
+
+    def restore(self, pixelclock, fps, exposure):
+        '''
+        Set back the settings read before the probing, in dependency order.
+        '''
+        self.camera.setPixelClock(pixelclock)
+        self.camera.setFrameRate(fps)
+        self.camera.setExposure(exposure)
+
+    def plan(self, fps, exposure):
+        '''
+        Return a dict with the pixelclock (MHz), fps and exposure (ms) to
+        use, the bandwidth needed (MB/s), and whether the target is feasible
+        at all and within usb_bandwidth.
+        The exposure can not be longer than the frame time: the fps is
+        lowered first if it is.
+        '''
+        fps       = min(fps, 1e3/exposure)
+        target    = fps
+        clocks    = self.camera.getPixelClockList()
+        previous  = (self.camera.getPixelClock(), self.camera.getFrameRate(), self.camera.getExposure())
+        lo, hi    = 0, len(clocks)-1
+        try:
+            if self.maxFrameRate(clocks[hi]) < fps:
+                lo = hi # even the fastest clock is too slow
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.maxFrameRate(clocks[mid]) >= fps:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            pixelclock = clocks[lo]
+            max_fps    = self.maxFrameRate(pixelclock)
+        finally:
+            self.restore(*previous)
+        # ---  --- #
+        fps        = min(fps, max_fps)
+        _, _, width, height = self.camera.get_aoi()
+        bandwidth  = estimate_bandwidth(width, height, getattr(self.camera, 'bpp', 8), fps)
+        return {'pixelclock': pixelclock,
+                'fps'       : fps,
+                'exposure'  : min(exposure, 1e3/fps),
+                'max_fps'   : max_fps,
+                'bandwidth' : bandwidth,
+                'feasible'  : max_fps >= target and bandwidth <= self.usb_bandwidth}
+
+    def apply(self, fps, exposure):
+        '''
+        Plan and apply the settings between two frames, in the dependency
+        order pixel clock, frame rate, exposure. Return a Future of the plan.
+        '''
+        def command():
+            plan = self.plan(fps, exposure)
+            self.camera.setPixelClock( plan['pixelclock'] )
+            self.camera.setFrameRate( plan['fps'] )
+            self.camera.setExposure( plan['exposure'] )
+            return plan
+        return self.camera.submit(command)
+
+####################################################################################################################
+# CODE
+####################################################################################################################
+if __name__ == '__main__':
+    print('STARTING')
+    print('1280x1024 8 bits at 25 fps: {:.1f} MB/s'.format(estimate_bandwidth(1280, 1024, 8, 25)))
+    print('FINISHED')
@@ -236,6 +236,8 @@ class PeakPlot(pg.PlotItem):
         # ---  --- #
         self.plot = pg.PlotDataItem()
         self.peakdata = None
+        self.timedata = []
+        self.timewindow = None
         self.name = name
         self.data = data
         self.span = span
@@ -258,6 +260,13 @@ class PeakPlot(pg.PlotItem):
     def setLengthMax(self, newlen):
         self.lengthmax = newlen
 
+    def setTimeWindow(self, duration):
+        '''
+        Keep only the points of the last duration seconds, when the points are
+        given with their acquisition time. None falls back on lengthmax.
+        '''
+        self.timewindow = duration
+
     def updatePlot(self):
         region = self.span.span.getRegion()
         m , M  = int(np.min(region)), int(np.max(region))
@@ -281,22 +290,48 @@ class PeakPlot(pg.PlotItem):
             self.log.addText( err_msg )
         return None
 
-    def addDataElement(self, y):
+    def addDataElement(self, y, t=None, redraw=True):
+        '''
+        Append the value y, acquired at time t (in s) if known, in which case
+        the x-axis is the time instead of the point index. With redraw False
+        the curve is only updated by the next call to redraw().
+        '''
         if type(self.peakdata) == type(None):
             self.peakdata = [y]
         else:
             self.peakdata.append(y)
-        if len(self.peakdata) > self.lengthmax:
+        if t is None:
+            self.timedata = []
+        elif len(self.timedata) != len(self.peakdata)-1: # previous points have no time, drop them
+            self.peakdata = self.peakdata[-1:]
+            self.timedata = [t]
+        else:
+            self.timedata.append(t)
+        # --- trim to the time window or to the maximum length --- #
+        if len(self.timedata) == len(self.peakdata) and self.timewindow is not None:
+            while self.timedata[-1] - self.timedata[0] > self.timewindow:
+                self.timedata.pop(0)
+                self.peakdata.pop(0)
+        elif len(self.peakdata) > self.lengthmax:
             for i in range( int(len(self.peakdata)-self.lengthmax) ):
                 if len(self.peakdata) !=0:
                     self.peakdata.pop(0)
                 else:
                     self.log.addText('Error in pop, the peakdata seem to be shorter than expected.')
         # ---  -- #
+        if redraw:
+            self.redraw()
+
+    def redraw(self):
+        if self.peakdata is None:
+            return None
         try:
             data = np.array(self.peakdata)
             #data = data/np.max(data)
-            self.plot.setData( data )
+            if len(self.timedata) == len(self.peakdata):
+                self.plot.setData( np.array(self.timedata), data )
+            else:
+                self.plot.setData( data )
         except:
             err_msg  = 'Issues with data, data: {}'.format(data)
             self.log.addText( err_msg )
@@ -6,47 +6,382 @@
 ####################################################################################################################
 # IMPORTATION
 ####################################################################################################################
+import os
 import sys
-import PyQt5
-from PyQt5.QtWidgets import QMainWindow, QWidget, QPushButton, QVBoxLayout, QApplication, QLineEdit, QHBoxLayout, QSpinBox
-from PyQt5.QtCore import Qt, QThread, QTimer, QObject, pyqtSignal, pyqtSlot
+import threading
+import collections
+import tempfile
+import queue
+import concurrent.futures
 
 import time
 import numpy     as np
-import pyqtgraph as pg
 
 ####################################################################################################################
 # FUNCTIONS
 ####################################################################################################################
+MOVIE_MEMORY_BUDGET = 2**30 # bytes, above it a movie is stored in a disk-backed memmap
+CACHE_MEMORY_BUDGET = 2**29 # bytes, decoded images kept by a FrameCache
 
-class ContinuousView(QObject):
-    # --- signal perso --- #
-    newshot  = pyqtSignal()
-    finished = pyqtSignal()
-    # ---  --- #
-    def __init__(self, fps=2., camera=None, view=None):
-        super().__init__()
-        self.camera   = camera
-        self.view     = view
-        self.fps      = fps
-        self.acqutime = 10 #s
-
-    @pyqtSlot()
-    def startFeed(self):
-        self.continue_ = True
-        i = 0
-        while self.continue_ and i<(self.acqutime*self.fps) :
-            time.sleep(1/self.fps)
-            self.newshot.emit()
-            print(i)
-            i += 1
-        self.finished.emit()
-
-    def stopFeed(self):
-        self.continue_ = False
-
-    def setFPS(self, fps):
-        self.fps = fps
+def allocate_frame_stack(num_frames, frame_shape, dtype, memory_budget=MOVIE_MEMORY_BUDGET, filename=None):
+    '''
+    Preallocate the (num_frames, *frame_shape) array receiving a movie.
+    If it does not fit in memory_budget (in bytes) it is a np.memmap on a
+    .npy file, filename or a temporary file, that can be reopened with
+    np.load(filename, mmap_mode='r').
+    '''
+    shape  = (num_frames,) + tuple(frame_shape)
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if nbytes <= memory_budget:
+        return np.empty(shape, dtype=dtype)
+    if filename is None:
+        fd, filename = tempfile.mkstemp(suffix='.npy', prefix='movie_')
+        os.close(fd)
+    return np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+
+def timestamps_path(filename):
+    '''
+    Path of the sidecar .npy holding the time (in s) of each frame of the
+    recording filename.
+    '''
+    return os.path.splitext(filename)[0] + '_timestamps.npy'
+
+def movie_statistics(num_frames, first_time, last_time, dropped):
+    '''
+    Summary of a burst acquisition, times in s.
+    '''
+    duration = last_time - first_time
+    fps      = (num_frames - 1) / duration if duration > 0 else 0.
+    return {'frames': num_frames, 'duration': duration, 'fps': fps, 'dropped': dropped}
+
+def run_between_frames(camera, func, *args):
+    '''
+    Run func(*args) from the acquisition thread of camera if it is running,
+    right away otherwise, and increase camera.settings_generation once done.
+    Return a concurrent.futures.Future of the result.
+    '''
+    def command(*args):
+        result = func(*args)
+        camera.settings_generation += 1
+        return result
+    acquisition = camera.acquisition
+    if acquisition is not None and acquisition.is_alive() and threading.current_thread() is not acquisition:
+        return acquisition.submit(command, *args)
+    future = concurrent.futures.Future()
+    try:
+        future.set_result( command(*args) )
+    except Exception as err:
+        future.set_exception(err)
+    return future
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FrameQueue:
+    '''
+    Bounded FIFO of frames shared between the acquisition thread and the GUI.
+    When the queue is full the oldest frame is dropped, so that a slow consumer
+    always gets the most recent frames.
+    '''
+    def __init__(self, maxsize=4):
+        self.maxsize   = maxsize
+        self.frames    = collections.deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped   = 0
+
+    def __len__(self):
+        with self.condition:
+            return len(self.frames)
+
+    def put(self, frame):
+        '''
+        Queue frame and return the oldest one if it was dropped for it, else None.
+        '''
+        dropped = None
+        with self.condition:
+            if len(self.frames) == self.maxsize:
+                self.dropped += 1
+                dropped = self.frames[0]
+            self.frames.append(frame)
+            self.condition.notify()
+        return dropped
+
+    def get(self, timeout=None):
+        '''
+        Return the oldest frame, waiting at most timeout (in s) for one to come.
+        Return None if no frame arrived in time.
+        '''
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.frames) != 0, timeout):
+                return None
+            return self.frames.popleft()
+
+    def get_latest(self):
+        '''
+        Return the newest frame and release the older ones, None if empty.
+        '''
+        with self.condition:
+            if len(self.frames) == 0:
+                return None
+            frame  = self.frames.pop()
+            older  = list(self.frames)
+            self.dropped += len(older)
+            self.frames.clear()
+        for record in older:
+            record.release()
+        return frame
+
+    def get_all(self):
+        '''
+        Return all the frames waiting, oldest first, and empty the queue.
+        '''
+        with self.condition:
+            frames = list(self.frames)
+            self.frames.clear()
+            return frames
+
+    def clear(self):
+        for frame in self.get_all():
+            frame.release()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class AcquisitionThread(threading.Thread):
+    '''
+    Background loop that waits for the camera to deliver a frame and hands it
+    to a FrameQueue. The capture rate thus follows the camera clock and not the
+    rate at which the GUI reads the frames.
+    The camera only needs the waitForNextFrame(timeout) and get_frame_record()
+    methods, the queued items being Frame records.
+    on_frame, if given, is called with each Frame from this thread before it
+    is queued.
+    Commands given to submit() are run by this thread between two frames, so
+    that the driver is never reconfigured from the GUI thread during a video.
+    '''
+    def __init__(self, camera, frame_queue, timeout=1000, on_frame=None):
+        super().__init__(name='Camera acquisition thread', daemon=True)
+        self.camera      = camera
+        self.frame_queue = frame_queue
+        self.on_frame    = on_frame
+        self.timeout     = timeout # ms
+        self.commands    = queue.Queue()
+        self.must_stop   = threading.Event()
+        self.frame_count = 0
+        self.error       = None
+
+    def run(self):
+        try:
+            while not self.must_stop.is_set():
+                self.run_commands()
+                if self.must_stop.is_set():
+                    break # a command restarted the acquisition in a new thread
+                if not self.camera.waitForNextFrame(self.timeout):
+                    continue
+                frame = self.camera.get_frame_record()
+                if self.on_frame is not None:
+                    self.on_frame(frame)
+                dropped = self.frame_queue.put( frame )
+                if dropped is not None:
+                    dropped.release() # gives its buffer back to the driver
+                self.frame_count += 1
+        except Exception as err:
+            self.error = err
+            self.camera.addToLog('Error: in acquisition thread.\n{}'.format(err))
+        self.run_commands() # the commands submitted while stopping are still due
+
+    def submit(self, func, *args):
+        '''
+        Queue func(*args) to be run between two frames and return its
+        concurrent.futures.Future.
+        '''
+        future = concurrent.futures.Future()
+        self.commands.put( (future, func, args) )
+        return future
+
+    def run_commands(self):
+        while True:
+            try:
+                future, func, args = self.commands.get_nowait()
+            except queue.Empty:
+                return None
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result( func(*args) )
+            except Exception as err:
+                future.set_exception(err)
+
+    def stop(self):
+        self.must_stop.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class AnalysisThread(threading.Thread):
+    '''
+    Background loop handing each frame of a Subscription (see FrameHub) to
+    on_frame, then releasing it. The analysis thus follows the camera frame
+    rate and not the rate of the GUI timers.
+    '''
+    def __init__(self, subscription, on_frame, timeout=0.1, log=None):
+        super().__init__(name='Frame analysis thread', daemon=True)
+        self.subscription = subscription
+        self.on_frame     = on_frame
+        self.timeout      = timeout # s
+        self.log          = log
+        self.must_stop    = threading.Event()
+        self.frame_count  = 0
+        self.error        = None
+
+    def addToLog(self, txt):
+        if self.log != None:
+            self.log.addText(txt)
+        else:
+            print(txt)
+
+    def run(self):
+        while not self.must_stop.is_set():
+            frame = self.subscription.get(self.timeout)
+            if frame is None:
+                continue
+            try:
+                self.on_frame(frame)
+                self.frame_count += 1
+            except Exception as err:
+                if str(err) != str(self.error): # once per error, not per frame
+                    self.addToLog('Error: in analysis thread.\n{}'.format(err))
+                self.error = err
+            finally:
+                frame.release()
+
+    def stop(self):
+        self.must_stop.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FrameCache:
+    '''
+    Thread-safe least recently used cache of decoded images, bounded by
+    memory_budget bytes (one image bigger than the budget is not kept).
+    '''
+    def __init__(self, memory_budget=CACHE_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self.nbytes  = 0
+        self.items   = collections.OrderedDict()
+        self.lock    = threading.Lock()
+        self.hits    = 0
+        self.misses  = 0
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key):
+        with self.lock:
+            image = self.items.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        if image.nbytes > self.memory_budget:
+            return None
+        with self.lock:
+            if key in self.items:
+                self.nbytes -= self.items.pop(key).nbytes
+            self.items[key] = image
+            self.nbytes    += image.nbytes
+            while self.nbytes > self.memory_budget:
+                _, old = self.items.popitem(last=False)
+                self.nbytes -= old.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.nbytes = 0
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class PrefetchThread(threading.Thread):
+    '''
+    Decode ahead of the reader: after prefetch(keys), load(key) is called in
+    this thread for each key missing in cache, in order, and the result put
+    in cache. A new prefetch() replaces the keys not reached yet.
+    Errors are given to log.
+    '''
+    def __init__(self, load, cache, log=print):
+        super().__init__(name='Prefetch thread', daemon=True)
+        self.load      = load
+        self.cache     = cache
+        self.log       = log
+        self.keys      = collections.deque()
+        self.condition = threading.Condition()
+        self.must_stop = False
+
+    def prefetch(self, keys):
+        with self.condition:
+            self.keys = collections.deque(keys)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.must_stop or len(self.keys) != 0)
+                if self.must_stop:
+                    break
+                key = self.keys.popleft()
+            if key in self.cache:
+                continue
+            try:
+                self.cache.put(key, self.load(key))
+            except Exception as err:
+                self.log('Error: in prefetch thread.\n{}'.format(err))
+
+    def stop(self):
+        with self.condition:
+            self.must_stop = True
+            self.condition.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+class FramePacer(threading.Thread):
+    '''
+    Software stand-in for the camera frame event: set frame_event every
+    1/camera.fps s, so that a simulated camera can block on it exactly like
+    the uEye acquisition loop blocks on IS_SET_EVENT_FRAME.
+    The fps is read again at each period, so it can be changed on the fly.
+    '''
+    def __init__(self, camera, frame_event):
+        super().__init__(name='Frame pacer thread', daemon=True)
+        self.camera      = camera
+        self.frame_event = frame_event
+        self.must_stop   = threading.Event()
+
+    def run(self):
+        next_frame_time = time.perf_counter()
+        while not self.must_stop.is_set():
+            next_frame_time += 1./self.camera.fps
+            now              = time.perf_counter()
+            if now - next_frame_time > 1.: # far behind, do not try to catch up
+                next_frame_time = now
+            if self.must_stop.wait( max(next_frame_time - now, 0.) ):
+                break
+            self.frame_event.set()
+
+    def stop(self):
+        self.must_stop.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
 
 ####################################################################################################################
 # CODE
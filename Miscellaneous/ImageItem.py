@@ -1,5 +1,6 @@
 from __future__ import division
 
+import sys
 from ..Qt import QtGui, QtCore
 import numpy as np
 from .. import functions as fn
@@ -58,6 +59,23 @@ class ImageItem(GraphicsObject):
         # and LUT more efficiently
         self._effectiveLut = None
 
+        # Render buffers reused while the shape and dtype stay the same, and
+        # the state of the last render, to skip it when nothing changed
+        self._generation = 0      ## increased with each new image data
+        self._lutGeneration = 0   ## increased with each change of levels or lut
+        self._renderKey = None
+        self._renderLut = None
+        self._renderQImage = None
+        self._argbBuffer = None
+        self._argbTable = None
+        self._argbTableSource = None
+        self._argbTableAlpha = False
+        self._argbAlpha = False
+        self._argbQImage = None
+        self._lastDownsample = (1, 1)
+        self._histogramKey = None
+        self._histogram = None
+
         self.drawKernel = None
         self.border = None
         self.removable = False
@@ -127,6 +145,7 @@ class ImageItem(GraphicsObject):
         if not fn.eq(levels, self.levels):
             self.levels = levels
             self._effectiveLut = None
+            self._lutGeneration += 1
             if update:
                 self.updateImage()
 
@@ -147,6 +166,7 @@ class ImageItem(GraphicsObject):
         if lut is not self.lut:
             self.lut = lut
             self._effectiveLut = None
+            self._lutGeneration += 1
             if update:
                 self.updateImage()
 
@@ -157,6 +177,7 @@ class ImageItem(GraphicsObject):
         Added in version 0.9.9
         """
         self.autoDownsample = ads
+        self._renderKey = None
         self.qimage = None
         self.update()
 
@@ -165,6 +186,8 @@ class ImageItem(GraphicsObject):
             val = kargs['axisOrder']
             if val not in ('row-major', 'col-major'):
                 raise ValueError('axisOrder must be either "row-major" or "col-major"')
+            if val != self.axisOrder:
+                self._renderKey = None
             self.axisOrder = val
         if 'lut' in kargs:
             self.setLookupTable(kargs['lut'], update=update)
@@ -194,6 +217,7 @@ class ImageItem(GraphicsObject):
 
     def clear(self):
         self.image = None
+        self._generation += 1
         self.prepareGeometryChange()
         self.informViewBoundsChanged()
         self.update()
@@ -247,8 +271,10 @@ class ImageItem(GraphicsObject):
         if image is None:
             if self.image is None:
                 return
+            self._generation += 1  ## the data may have been changed in place, see updateImage
         else:
             gotNewData = True
+            self._generation += 1
             shapeChanged = (self.image is None or image.shape != self.image.shape)
             image = image.view(np.ndarray)
             if self.image is None or image.dtype != self.image.dtype:
@@ -354,6 +380,9 @@ class ImageItem(GraphicsObject):
 
     def render(self):
         # Convert data to QImage for display.
+        # The previous QImage is kept when neither the data (generation
+        # counter, also increased by updateImage and clear) nor the
+        # levels / lut changed since it was rendered.
 
         profile = debug.Profiler()
         if self.image is None or self.image.size == 0:
@@ -369,22 +398,21 @@ class ImageItem(GraphicsObject):
             lut = None
 
         if self.autoDownsample:
-            # reduce dimensions of image based on screen resolution
-            o = self.mapToDevice(QtCore.QPointF(0,0))
-            x = self.mapToDevice(QtCore.QPointF(1,0))
-            y = self.mapToDevice(QtCore.QPointF(0,1))
-
             # Check if graphics view is too small to render anything
-            if o is None or x is None or y is None:
-                return
-
-            w = Point(x-o).length()
-            h = Point(y-o).length()
-            if w == 0 or h == 0:
+            xds, yds = self._downsampleFactors()
+            if xds is None:
                 self.qimage = None
                 return
-            xds = max(1, int(1.0 / w))
-            yds = max(1, int(1.0 / h))
+        else:
+            xds, yds = 1, 1
+        renderKey = (self._generation, self._lutGeneration, xds, yds)
+        if renderKey == self._renderKey and lut is self._renderLut and self._renderQImage is not None:
+            self.qimage = self._renderQImage
+            return
+        renderLut = lut
+
+        if self.autoDownsample:
+            # reduce dimensions of image based on screen resolution
             axes = [1, 0] if self.axisOrder == 'row-major' else [0, 1]
             image = fn.downsample(self.image, xds, axis=axes[0])
             image = fn.downsample(image, yds, axis=axes[1])
@@ -428,8 +456,54 @@ class ImageItem(GraphicsObject):
         if self.axisOrder == 'col-major':
             image = image.transpose((1, 0, 2)[:image.ndim])
 
-        argb, alpha = fn.makeARGB(image, lut=lut, levels=levels)
-        self.qimage = fn.makeQImage(argb, alpha, transpose=False)
+        if levels is None and lut is not None and lut.dtype == np.ubyte and image.ndim == 2 and image.dtype.kind in 'ui':
+            self.qimage = self._renderLookup(image, lut)
+        else:
+            argb, alpha = fn.makeARGB(image, lut=lut, levels=levels)
+            self.qimage = fn.makeQImage(argb, alpha, transpose=False)
+        self._renderQImage = self.qimage
+        self._renderKey = renderKey
+        self._renderLut = renderLut
+
+    def _downsampleFactors(self):
+        # Downsampling factors matching the screen resolution, None if the
+        # view is too small to render anything.
+        o = self.mapToDevice(QtCore.QPointF(0,0))
+        x = self.mapToDevice(QtCore.QPointF(1,0))
+        y = self.mapToDevice(QtCore.QPointF(0,1))
+        if o is None or x is None or y is None:
+            return None, None
+        w = Point(x-o).length()
+        h = Point(y-o).length()
+        if w == 0 or h == 0:
+            return None, None
+        return max(1, int(1.0 / w)), max(1, int(1.0 / h))
+
+    def _renderLookup(self, image, lut):
+        # Fast path for an integer image through a ubyte lut: a single np.take
+        # of 32-bit ARGB pixels into a buffer, and a QImage on that buffer,
+        # both reused while the shape of the image stays the same.
+        if lut is not self._argbTableSource:
+            table = np.empty((lut.shape[0], 4), dtype=np.ubyte)
+            order = [2, 1, 0, 3] if sys.byteorder == 'little' else [1, 2, 3, 0]
+            if lut.ndim == 1:
+                for i in order[:3]:
+                    table[:, i] = lut
+            else:
+                for i in range(min(lut.shape[1], 3)):
+                    table[:, order[i]] = lut[:, i]
+            table[:, order[3]] = lut[:, 3] if lut.ndim == 2 and lut.shape[1] == 4 else 255
+            self._argbTable = table.view(np.uint32)[:, 0]
+            self._argbTableSource = lut
+            self._argbTableAlpha = bool(np.any(table[:, order[3]] != 255))
+        alpha = self._argbTableAlpha
+        if self._argbBuffer is None or self._argbBuffer.shape != image.shape or self._argbAlpha != alpha:
+            self._argbBuffer = np.empty(image.shape, dtype=np.uint32)
+            self._argbAlpha = alpha
+            argb = self._argbBuffer.view(np.ubyte).reshape(image.shape + (4,))
+            self._argbQImage = fn.makeQImage(argb, alpha, copy=False, transpose=False)
+        np.take(self._argbTable, image, out=self._argbBuffer, mode='clip')
+        return self._argbQImage
 
     def paint(self, p, *args):
         profile = debug.Profiler()
@@ -478,6 +552,10 @@ class ImageItem(GraphicsObject):
         and the output is a list of the results.
 
         This method is also used when automatically computing levels.
+
+        For uint8 and uint16 images with automatic bins, the pixels are counted
+        exactly with np.bincount, and the result is kept until the image data
+        change (see the generation counter of setImage).
         """
         if self.image is None or self.image.size == 0:
             return None, None
@@ -488,6 +566,17 @@ class ImageItem(GraphicsObject):
             step = (step, step)
         stepData = self.image[::step[0], ::step[1]]
 
+        if 'auto' == bins and not kwds and stepData.dtype in (np.ubyte, np.uint16):
+            key = (self._generation, step, perChannel, targetHistogramSize)
+            if key != self._histogramKey:
+                if perChannel:
+                    self._histogram = [self._integerHistogram(stepData[..., i], targetHistogramSize)
+                                       for i in range(stepData.shape[-1])]
+                else:
+                    self._histogram = self._integerHistogram(stepData, targetHistogramSize)
+                self._histogramKey = key
+            return self._histogram
+
         if 'auto' == bins:
             mn = np.nanmin(stepData)
             mx = np.nanmax(stepData)
@@ -500,7 +589,7 @@ class ImageItem(GraphicsObject):
             if stepData.dtype.kind in "ui":
                 # For integer data, we select the bins carefully to avoid aliasing
                 step = np.ceil((mx-mn) / 500.)
-                bins = np.arange(mn, mx+1.01*step, step, dtype=np.int)
+                bins = np.arange(mn, mx+1.01*step, step, dtype=int)
             else:
                 # for float data, let numpy select the bins.
                 bins = np.linspace(mn, mx, 500)
@@ -523,6 +612,16 @@ class ImageItem(GraphicsObject):
             hist = np.histogram(stepData, **kwds)
             return hist[1][:-1], hist[0]
 
+    def _integerHistogram(self, data, targetHistogramSize):
+        # Exact histogram of uint8/uint16 data with np.bincount, grouped in
+        # bins of integer width so that there are about targetHistogramSize.
+        counts = np.bincount(data.ravel())
+        mn = int(np.argmax(counts > 0))
+        counts = counts[mn:]
+        width = max(1, int(np.ceil(len(counts) / targetHistogramSize)))
+        counts = np.append(counts, np.zeros(-len(counts) % width, dtype=counts.dtype))
+        return mn + np.arange(len(counts) // width) * width, counts.reshape(-1, width).sum(axis=1)
+
     def setPxMode(self, b):
         """
         Set whether the item ignores transformations and draws directly to screen pixels.
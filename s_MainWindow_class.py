@@ -10,9 +10,9 @@ import PyQt5
 from PyQt5.QtWidgets import QDesktopWidget, QApplication, QMainWindow, QWidget, QFrame, QTabWidget, QTableWidget
 from PyQt5.QtWidgets import QBoxLayout,QGroupBox,QHBoxLayout,QVBoxLayout,QGridLayout,QSplitter,QScrollArea
 from PyQt5.QtWidgets import QToolTip, QPushButton, QLabel, QLineEdit, QTextEdit, QCheckBox, QComboBox, QInputDialog
-from PyQt5.QtWidgets import QMessageBox, QFileDialog, QAction
+from PyQt5.QtWidgets import QMessageBox, QFileDialog, QAction, QTableWidgetItem
 from PyQt5.QtGui     import QIcon, QFont
-from PyQt5.QtCore    import QDate, QTime, QDateTime, Qt
+from PyQt5.QtCore    import QDate, QTime, QDateTime, Qt, QTimer, pyqtSignal
 
 
 
@@ -20,8 +20,8 @@ from s_LogDisplay_class               import LogDisplay
 from s_Preview_class                  import Preview
 from s_DCMeasurement_class            import DCMeasurement
 from s_PhaseNetworkElements_class     import PhaseNetworkElements
-from s_Camera_class                   import Camera
-from s_SimuCamera_class               import SimuCamera
+from s_CameraManager_class            import CameraManager
+from s_CameraDisplay_class            import CameraDisplay
 
 import numpy as np
 import os
@@ -31,9 +31,11 @@ import os
 ################################################################################################
 
 class CameraManagementWindow(QMainWindow):
-    def __init__(self, camera=None):
+    camera_selected = pyqtSignal(int)
+
+    def __init__(self, manager=None):
         super().__init__()
-        self.camera        = camera
+        self.manager       = manager
         self.layout        = QGridLayout()
         self.centralwidget = QWidget()
         # ---  --- #
@@ -41,32 +43,106 @@ class CameraManagementWindow(QMainWindow):
         self.setCentralWidget(self.centralwidget)
         # ---  --- #
         self.initUI()
+        self.manager.opened.connect( self.cameraOpened )
+        self.refreshCameraList()
 
     def initUI(self):
         self.cameraname = QLabel('current camera name')
         self.open_state = QLabel('Camera open state')
         self.camera_list= QComboBox()
         self.button_refresh_camList = QPushButton('Look for camera')
+        self.button_open     = QPushButton('Open')
+        self.button_select   = QPushButton('Use for new tabs')
+        self.button_startall = QPushButton('Start all')
+        self.button_startall.setToolTip('Run the acquisition of every opened camera, each in its own thread.')
+        self.button_stopall  = QPushButton('Stop all')
+        self.button_synthetic= QPushButton('Open synthetic camera')
+        self.button_synthetic.setToolTip('Generated frames (1280x1024, 200 fps) to load test the tabs.')
+        self.stat_table      = QTableWidget(0, 3)
+        self.stat_table.setHorizontalHeaderLabels(['Camera', 'Received', 'Dropped'])
+        self.stat_timer      = QTimer()
+        self.stat_timer.setInterval(1000)
+        # --- connections --- #
+        self.button_refresh_camList.clicked.connect( self.refreshCameraList )
+        self.button_open.clicked.connect( self.openSelectedCamera )
+        self.button_select.clicked.connect( self.selectCamera )
+        self.button_startall.clicked.connect( self.manager.start_all )
+        self.button_stopall.clicked.connect( self.manager.stop_all )
+        self.button_synthetic.clicked.connect( self.openSynthetic )
+        self.camera_list.currentIndexChanged.connect( self.displayOpenState )
+        self.stat_timer.timeout.connect( self.updateStatistics )
         # --- make layout --- #
         self.layout.addWidget(self.cameraname, 0,0)
         self.layout.addWidget(self.open_state, 0,1)
         self.layout.addWidget(self.camera_list, 1,0)
         self.layout.addWidget(self.button_refresh_camList, 1,1)
-
-    def displayCameraProperties(self):
-        opened       = self.camera.isOpened()
-        pos          = self.camera.get(cv2.CAP_PROP_POS_MSEC)
-        frame_width  = self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)
-        frame_height = self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)
-        fps          = self.camera.get(cv2.CAP_PROP_FPS)
-        format_frame_data = self.camera.get(cv2.CAP_PROP_FORMAT)
-        brightness   = self.camera.get(cv2.CAP_PROP_BRIGHTNESS)
-        contraste    = self.camera.get(cv2.CAP_PROP_CONTRAST)
-        saturation   = self.camera.get(cv2.CAP_PROP_SATURATION)
-        color_hue    = self.camera.get(cv2.CAP_PROP_HUE)
-        exposure     = self.camera.get(cv2.CAP_PROP_EXPOSURE)
-        gain         = self.camera.get(cv2.CAP_PROP_GAIN)
-        conversion   = self.camera.get(cv2.CAP_PROP_CONVERT_RGB)
+        self.layout.addWidget(self.button_open, 2,0)
+        self.layout.addWidget(self.button_select, 2,1)
+        self.layout.addWidget(self.button_startall, 3,0)
+        self.layout.addWidget(self.button_stopall, 3,1)
+        self.layout.addWidget(self.button_synthetic, 4,0 , 1,2)
+        self.layout.addWidget(self.stat_table, 5,0 , 1,2)
+
+    def showEvent(self, event):
+        self.stat_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.stat_timer.stop()
+        super().hideEvent(event)
+
+    def refreshCameraList(self):
+        self.camera_list.clear()
+        for device in self.manager.refresh():
+            self.camera_list.addItem('{model} ({serial})'.format(**device), device['device_id'])
+        for device_id in self.manager.cameras:
+            if self.camera_list.findData(device_id) == -1:
+                name = {-1: 'Simulation', -2: 'Synthetic'}.get(device_id, 'Camera {}'.format(device_id))
+                self.camera_list.addItem(name, device_id)
+        self.displayOpenState()
+
+    def displayOpenState(self):
+        device_id = self.camera_list.currentData()
+        if device_id is None:
+            self.cameraname.setText('No camera found')
+            self.open_state.setText('')
+            return None
+        self.cameraname.setText( self.camera_list.currentText() )
+        if device_id in self.manager.cameras:
+            self.open_state.setText('Open')
+        elif device_id in self.manager.openers:
+            self.open_state.setText('Opening...')
+        else:
+            self.open_state.setText('Closed')
+
+    def openSelectedCamera(self):
+        device_id = self.camera_list.currentData()
+        if device_id is None:
+            return None
+        self.manager.open(device_id)
+        self.displayOpenState()
+
+    def openSynthetic(self):
+        if -2 not in self.manager.cameras:
+            self.manager.open_synthetic()
+        self.refreshCameraList()
+        self.camera_list.setCurrentIndex( self.camera_list.findData(-2) )
+
+    def cameraOpened(self, device_id, isInit):
+        self.displayOpenState()
+
+    def selectCamera(self):
+        device_id = self.camera_list.currentData()
+        if device_id in self.manager.cameras:
+            self.camera_selected.emit(device_id)
+
+    def updateStatistics(self):
+        cameras = self.manager.cameras
+        self.stat_table.setRowCount( len(cameras) )
+        for row, (device_id, camera) in enumerate(list(cameras.items())):
+            self.stat_table.setItem(row, 0, QTableWidgetItem( str(device_id) ))
+            self.stat_table.setItem(row, 1, QTableWidgetItem( str(camera.frame_counter.received) ))
+            self.stat_table.setItem(row, 2, QTableWidgetItem( str(camera.frame_counter.dropped) ))
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 
@@ -106,8 +182,9 @@ class MainWindow(QMainWindow): # inherits from the QMainWindow class
         self.log        = LogDisplay()
         self.insertNewTabLogDisplay(self.log)
         # --- main attributes --- #
-        self.cameraManag = CameraManagementWindow()
         self.initCamera()
+        self.cameraManag = CameraManagementWindow(manager=self.cameras)
+        self.cameraManag.camera_selected.connect( self.setCurrentCamera )
 
     def initWindowMenu(self):
         '''
@@ -139,13 +216,31 @@ class MainWindow(QMainWindow): # inherits from the QMainWindow class
         self.setCentralWidget(self.centraltab)
 
     def initCamera(self):
+        '''
+        Open the first free camera for the tabs, and the other ones in the
+        background. Fall back on a SimuCamera when no camera is found.
+        '''
         dir_path = '/home/cgou/ENS/STAGE/M2--stage/Camera_acquisition/Miscellaneous/Camera_views/'
-        self.camera   = Camera(cam_id=0, log=self.log)
-        if not self.camera.isCameraInit:
-            self.camera = SimuCamera(0, directory_path=dir_path, log=self.log)
+        self.cameras = CameraManager(log=self.log, simu_path=dir_path)
+        free_ids     = [device['device_id'] for device in self.cameras.refresh() if not device['in_use']]
+        self.camera  = None
+        if len(free_ids) != 0:
+            self.cameras.open(free_ids[0], wait=True)
+            self.camera = self.cameras.get_camera(free_ids[0])
+        if self.camera is None:
+            self.camera = self.cameras.open_simulation()
             self.log.addText( self.camera.__str__() )
         else:
             self.log.addText('Camera in use is: USB camera')
+        for device_id in free_ids[1:]:
+            self.cameras.open(device_id)
+
+    def setCurrentCamera(self, device_id):
+        '''
+        Camera given to the tabs opened from now on.
+        '''
+        self.camera = self.cameras.get_camera(device_id)
+        self.log.addText('Camera {} used for the new tabs.'.format(device_id))
 
     def setWindToCenter(self):
         '''
@@ -158,12 +253,12 @@ class MainWindow(QMainWindow): # inherits from the QMainWindow class
 
     def closeTabe(self, index):
         '''
-        Remove the Tab of index index (integer).
+        Remove the Tab of index index (integer). Its views unsubscribe from
+        the camera, which keeps running for the other tabs.
         '''
+        for view in self.centraltab.widget(index).findChildren(CameraDisplay):
+            view.stop_continuous_view()
         self.centraltab.removeTab(index)
-        self.camera.stop_video()
-        self.camera.close_camera()
-        self.log.addText('Is camera closed ? {}'.format( not self.camera.isCameraInit ) )
 
     def getFile(self):
         '''
@@ -266,8 +361,7 @@ class MainWindow(QMainWindow): # inherits from the QMainWindow class
 
     def closeMainWindow(self):
         try:
-            self.camera.stop_video()
-            self.camera.close_camera()
+            self.cameras.close_all()
         except:
             pass
         print('Is camera closed ? {}'.format( not self.camera.isCameraInit ) )